@@ -0,0 +1,38 @@
+"""
+__init__.py
+
+The tutorial modules and the performance helpers built on them. Submodules
+are imported the first time they are used (`src.repeated.find_repeated_words`),
+so `import src` costs next to nothing, and no module compiles a regex until
+one of its functions runs. That keeps short-lived scripts that only validate
+a few strings from paying for the whole package at startup.
+"""
+
+_SUBMODULES = frozenset({
+    "advanced",
+    "analysis",
+    "basics",
+    "batch",
+    "casefold",
+    "client",
+    "daemon",
+    "incremental",
+    "intermediate",
+    "prefilter",
+    "repeated",
+    "streaming",
+    "trigram",
+})
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        # Importing binds the submodule in this namespace, so this hook only
+        # runs on first access.
+        __import__(f"{__name__}.{name}")
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
@@ -0,0 +1,227 @@
+"""
+analysis.py
+
+This module inspects the parse tree of a regular expression to answer
+questions the engine itself does not expose, such as how far a single match
+attempt can look ahead of (or behind) the position where it starts.
+The helpers here are shared by the performance-oriented matchers in this package.
+"""
+
+import re
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+class LazyPattern:
+    """
+    A pattern that is compiled the first time it is used, not at import.
+
+    Module-level `LazyPattern`s keep importing this package free of regex
+    compilation. Each method looked up is stored on the instance, so later
+    calls such as `WORD.finditer(text)` cost the same as on an `re.Pattern`.
+
+    Args:
+        pattern (str or bytes): The regex pattern.
+        flags (int): Regex flags.
+    """
+
+    def __init__(self, pattern, flags=0):
+        self._source = (pattern, flags)
+        self._compiled = None
+
+    def compile(self):
+        """Returns the compiled `re.Pattern`, compiling it on the first call."""
+        if self._compiled is None:
+            self._compiled = re.compile(*self._source)
+        return self._compiled
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        value = getattr(self.compile(), name)
+        setattr(self, name, value)
+        return value
+
+    def __repr__(self):
+        return f"LazyPattern({self._source[0]!r}, {self._source[1]!r})"
+
+
+def findall_value(match):
+    """
+    Returns what `re.findall()` would report for a single match.
+
+    Args:
+        match (re.Match): The match object.
+
+    Returns:
+        str or tuple: The whole match if the pattern has no groups, the single
+            group if it has one, otherwise a tuple of all groups.
+    """
+    groups = match.groups()
+    if not groups:
+        return match.group()
+    empty = match.string[:0]
+    if len(groups) == 1:
+        return groups[0] if groups[0] is not None else empty
+    return tuple(g if g is not None else empty for g in groups)
+
+
+def parse_pattern(pattern, flags=0):
+    """
+    Parses a pattern into the tree used internally by the `re` module.
+
+    Args:
+        pattern (str or re.Pattern): The regex pattern to parse.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Returns:
+        SubPattern: The parsed pattern.
+    """
+    if isinstance(pattern, re.Pattern):
+        pattern, flags = pattern.pattern, pattern.flags
+    return sre_parse.parse(pattern, flags)
+
+
+def iter_nodes(items):
+    """
+    Yields every (opcode, argument) node of a parsed pattern, depth first.
+
+    Args:
+        items (SubPattern or list): A parsed pattern or a list of nodes.
+
+    Yields:
+        tuple: (opcode, argument) pairs.
+    """
+    for op, av in items:
+        yield op, av
+        if op is sre_parse.SUBPATTERN:
+            yield from iter_nodes(av[3])
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) or op is getattr(sre_parse, "POSSESSIVE_REPEAT", None):
+            yield from iter_nodes(av[2])
+        elif op is sre_parse.BRANCH:
+            for branch in av[1]:
+                yield from iter_nodes(branch)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            yield from iter_nodes(av[1])
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            yield from iter_nodes(av)
+        elif op is sre_parse.GROUPREF_EXISTS:
+            yield from iter_nodes(av[1])
+            if av[2] is not None:
+                yield from iter_nodes(av[2])
+
+
+def pattern_reach(pattern, flags=0):
+    """
+    Estimates how much text a single match attempt can examine.
+
+    The estimate is conservative: every lookahead is assumed to start at the
+    far end of the match, and every boundary assertion is assumed to peek at
+    one neighbouring character (two for `$`, which may skip a final newline).
+
+    Args:
+        pattern (str or re.Pattern): The regex pattern to analyse.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Returns:
+        tuple: (behind, ahead) where `behind` is the number of characters an
+            attempt may inspect before its start position and `ahead` is the
+            number it may inspect from its start position onwards, or None if
+            the pattern can match (or look ahead) an unbounded distance.
+    """
+    parsed = parse_pattern(pattern, flags)
+    ahead = parsed.getwidth()[1]
+    behind = 0
+    for op, av in iter_nodes(parsed):
+        if op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            width = av[1].getwidth()[1]
+            if av[0] < 0:
+                behind = max(behind, width)
+            else:
+                ahead += width
+        elif op is sre_parse.AT:
+            behind = max(behind, 1)
+    if ahead >= sre_parse.MAXREPEAT:
+        return behind + 1, None
+    return behind + 1, ahead + 2
+
+
+def literal_string(pattern, flags=0):
+    """
+    Returns the text matched by a pattern made only of literal characters.
+
+    Args:
+        pattern (str or re.Pattern): The regex pattern to analyse.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Returns:
+        str or None: The literal text, or None if the pattern contains any
+            operator, class, group or anchor (or is empty).
+    """
+    parsed = parse_pattern(pattern, flags)
+    if not parsed or any(op is not sre_parse.LITERAL for op, _ in parsed):
+        return None
+    return "".join(chr(av) for _, av in parsed)
+
+
+def _required(items):
+    """Collects the required-literal clauses of a sequence of nodes."""
+    clauses = []
+    run = []
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            clauses.append(("".join(run),))
+            run = []
+        if op is sre_parse.SUBPATTERN:
+            # A scoped `(?i:...)` group matches other cases than its literals.
+            if not av[1] & re.IGNORECASE:
+                clauses.extend(_required(av[3]))
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            clauses.extend(_required(av))
+        elif (op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+                or op is getattr(sre_parse, "POSSESSIVE_REPEAT", None)) and av[0] >= 1:
+            clauses.extend(_required(av[2]))
+        elif op is sre_parse.BRANCH:
+            # One literal from each alternative must appear.
+            best = []
+            for branch in av[1]:
+                options = _required(branch)
+                if not options:
+                    break
+                best.append(max(options, key=lambda clause: min(map(len, clause))))
+            else:
+                clauses.append(tuple(sorted({s for clause in best for s in clause})))
+    if run:
+        clauses.append(("".join(run),))
+    return clauses
+
+
+def required_literals(pattern, flags=0):
+    """
+    Lists literal strings that every match of a pattern must contain.
+
+    The result is a list of clauses; each clause is a tuple of strings, and
+    every match contains at least one string from every clause. For example
+    `User '(.*?)' performed` gives [("User '",), ("' performed",)] and
+    `cat|dog` gives [("cat", "dog")]. Text inside lookarounds is ignored,
+    since it need not be part of the match, and so is text inside scoped
+    `(?i:...)` groups, which may match in another case.
+
+    Args:
+        pattern (str or re.Pattern): The regex pattern to analyse.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Returns:
+        list: A list of tuples of strings; empty if nothing is required or
+            the pattern is case-insensitive.
+    """
+    parsed = parse_pattern(pattern, flags)
+    if parsed.state.flags & re.IGNORECASE:
+        return []
+    return _required(parsed)
@@ -0,0 +1,298 @@
+"""
+batch.py
+
+This module evaluates simple patterns over whole columns of strings at once
+with NumPy, instead of calling `re` from a Python loop for every row.
+Patterns of the form `^prefix.*suffix$` (like exercise 2's `^Hello.*World$`)
+are checked by comparing code points of the rows that have the prefix, and
+`findall()`-style extraction (like exercise 1's `\\d+`) only runs the regex
+on rows that can possibly match. Patterns that cannot be vectorized fall
+back to per-row `re`.
+
+NumPy's string functions cost about as much per row as a short
+`re.match()`, so the gain comes from skipping rows and from working on the
+raw code points: run `python -m src.batch` for numbers (about 1.6x for
+exercise 2). It needs a column that is already a NumPy array; converting a
+Python list costs more than the `re` loop it replaces.
+
+Requires NumPy.
+"""
+
+import re
+
+import numpy as np
+
+from src.analysis import parse_pattern, sre_parse
+
+# numpy.strings appeared in NumPy 2.0; older releases only have numpy.char.
+_strings = getattr(np, "strings", np.char)
+
+_BEGIN = (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING)
+_END = (sre_parse.AT_END, sre_parse.AT_END_STRING)
+
+
+def _compile(pattern, flags):
+    """Compiles a pattern unless it is already compiled."""
+    return pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+
+
+def _as_array(values):
+    """Converts a list or NumPy array of strings to a contiguous fixed-width unicode array."""
+    array = np.asarray(values)
+    if array.dtype.kind != "U":
+        array = array.astype(str)
+    elif not array.dtype.isnative:
+        array = array.astype(array.dtype.newbyteorder("="))
+    # Code point views (see `_codes()`) need one contiguous buffer.
+    return np.ascontiguousarray(array)
+
+
+def _codes(array):
+    """Views a unicode array as one row of uint32 code points per string, zero-padded."""
+    return array.view(np.uint32).reshape(array.size, array.dtype.itemsize // 4)
+
+
+def _prefix_mask(array, prefix):
+    """
+    Evaluates `startswith(prefix)` on every row by comparing code points,
+    which costs a fraction of NumPy's string functions on long columns.
+    """
+    size = 4 * len(prefix)
+    if size > array.dtype.itemsize:
+        return np.zeros(array.shape, dtype=bool)
+    if not size:
+        return np.ones(array.shape, dtype=bool)
+    # Compare the leading bytes of each row as one opaque value.
+    key = np.array([ord(char) for char in prefix], dtype=np.uint32).view(f"V{size}")
+    leading = array.view(np.uint8).reshape(array.size, array.dtype.itemsize)[:, :size]
+    return (leading.view(key.dtype)[:, 0] == key[0]).reshape(array.shape)
+
+
+def _is_dot_star(op, av):
+    """Checks whether a node is `.*` or `.*?`."""
+    return (
+        op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+        and av[0] == 0
+        and av[1] == sre_parse.MAXREPEAT
+        and list(av[2]) == [(sre_parse.ANY, None)]
+    )
+
+
+def _anchored_literal_shape(pattern):
+    """
+    Breaks a pattern into (prefix, dot_star, suffix, end_anchor) if it has the
+    shape `^?prefix(.*suffix)?(\\Z|$)?` made of plain literals, else returns None.
+    """
+    if pattern.flags & re.IGNORECASE:
+        return None
+    nodes = list(parse_pattern(pattern))
+    if nodes and nodes[0][0] is sre_parse.AT and nodes[0][1] in _BEGIN:
+        nodes = nodes[1:]
+    end = None
+    if nodes and nodes[-1][0] is sre_parse.AT and nodes[-1][1] in _END:
+        end = nodes.pop()[1]
+        if end is sre_parse.AT_END and pattern.flags & re.MULTILINE:
+            return None
+    prefix, suffix, dot_star = [], [], False
+    for op, av in nodes:
+        if op is sre_parse.LITERAL:
+            (suffix if dot_star else prefix).append(chr(av))
+        elif _is_dot_star(op, av) and not dot_star and not suffix:
+            dot_star = True
+        else:
+            return None
+    return "".join(prefix), dot_star, "".join(suffix), end
+
+
+def _anchored_literal_mask(array, shape, compiled):
+    """
+    Evaluates `re.match()` for an anchored-literal pattern on every row.
+
+    Only rows that start with the prefix are examined, through their code
+    points, as if `.` matched anything. The few rows where a newline could
+    change the answer are then matched with `re`.
+    """
+    prefix, dot_star, suffix, end = shape
+    values = array.ravel()
+    mask = np.zeros(values.shape, dtype=bool)
+    rows = np.flatnonzero(_prefix_mask(values, prefix))
+    if not dot_star and end is None:
+        mask[rows] = True
+        return mask.reshape(array.shape)
+
+    codes = _codes(values)[rows]
+    if end is None:
+        found = _strings.find(values[rows], suffix, len(prefix)) != -1
+        recheck = np.zeros(found.shape, dtype=bool)
+    else:
+        # Strings have no trailing NULs, so a row ends after its last non-zero code point.
+        last = np.argmax(codes[:, ::-1] != 0, axis=1)
+        lengths = codes.shape[1] - last
+        lengths[(last == 0) & (codes[:, -1] == 0)] = 0
+        if dot_star:
+            found = lengths >= len(prefix) + len(suffix)
+            if suffix:
+                columns = np.maximum(lengths[:, None] - len(suffix) + np.arange(len(suffix)), 0)
+                expected = np.array([ord(char) for char in suffix], dtype=np.uint32)
+                found &= (np.take_along_axis(codes, columns, axis=1) == expected).all(axis=1)
+        else:
+            found = lengths == len(prefix)
+        recheck = np.zeros(found.shape, dtype=bool)
+        if end is sre_parse.AT_END:
+            # `$` also matches just before a final newline.
+            recheck = ~found & (codes[np.arange(len(rows)), lengths - 1] == 10)
+    if dot_star and not compiled.flags & re.DOTALL:
+        # `.` does not match a newline; only rows that matched can be affected.
+        hits = np.flatnonzero(found)
+        recheck[hits[(codes[hits] == 10).any(axis=1)]] = True
+    mask[rows] = found
+    mask[rows[recheck]] = [compiled.match(value) is not None for value in values[rows[recheck]].tolist()]
+    return mask.reshape(array.shape)
+
+
+def match_mask(pattern, values, flags=0):
+    """
+    Evaluates `re.match(pattern, value)` for every value in a column.
+
+    Patterns made of a literal prefix, optionally followed by `.*` and a
+    literal suffix, and optionally anchored with `^`, `$` or `\\Z`, are
+    evaluated on the code points of the rows, leaving only rows with a
+    newline to `re`. Anything else is matched row by row.
+
+    Args:
+        pattern (str or re.Pattern): The regex pattern to match.
+        values (list or numpy.ndarray): The strings to test.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Returns:
+        numpy.ndarray: A boolean mask, True where the row matches.
+    """
+    compiled = _compile(pattern, flags)
+    array = _as_array(values)
+    shape = _anchored_literal_shape(compiled)
+    # Padding is also zeros, so a NUL in the pattern cannot be told apart from it.
+    if shape is not None and array.dtype.itemsize and "\0" not in shape[0] + shape[2]:
+        return _anchored_literal_mask(array, shape, compiled)
+    match = compiled.match
+    mask = np.fromiter((match(value) is not None for value in array.ravel().tolist()), dtype=bool, count=array.size)
+    return mask.reshape(array.shape)
+
+
+def _leading_codepoints(pattern):
+    """
+    Returns (ranges, unicode_digits) describing the characters a match must
+    start with, or None if that set is not known. `ranges` is a list of
+    inclusive (low, high) code point ranges; `unicode_digits` is True if
+    non-ASCII decimal digits can also start a match.
+    """
+    if pattern.flags & re.IGNORECASE:
+        return None
+    nodes = list(parse_pattern(pattern))
+    while nodes and nodes[0][0] is sre_parse.SUBPATTERN:
+        group, add_flags, del_flags, items = nodes[0][1]
+        if add_flags or del_flags:
+            return None  # Scoped flags such as `(?i:...)` change what the group matches.
+        nodes = list(items) + nodes[1:]
+    if not nodes:
+        return None
+    op, av = nodes[0]
+    if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1 and len(av[2]) == 1:
+        op, av = list(av[2])[0]
+    if op is sre_parse.LITERAL:
+        return [(av, av)], False
+    if op is not sre_parse.IN:
+        return None
+    ranges, unicode_digits = [], False
+    for item_op, item_av in av:
+        if item_op is sre_parse.LITERAL:
+            ranges.append((item_av, item_av))
+        elif item_op is sre_parse.RANGE:
+            ranges.append(item_av)
+        elif item_op is sre_parse.CATEGORY and item_av is sre_parse.CATEGORY_DIGIT:
+            ranges.append((ord("0"), ord("9")))
+            unicode_digits = not pattern.flags & re.ASCII
+        else:
+            return None
+    return ranges, unicode_digits
+
+
+def candidate_mask(pattern, values, flags=0):
+    """
+    Flags the rows that could contain a match, without running the regex.
+
+    A row is a candidate if it contains a character that a match can start
+    with (e.g. a digit for `\\d+`, a `#` for `#\\w+`). Rows are compared as
+    arrays of code points, so this is a single vectorized pass.
+
+    Args:
+        pattern (str or re.Pattern): The regex pattern.
+        values (list or numpy.ndarray): The strings to screen.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Returns:
+        numpy.ndarray: A boolean mask; False rows are guaranteed not to match.
+    """
+    compiled = _compile(pattern, flags)
+    array = _as_array(values)
+    leading = _leading_codepoints(compiled)
+    if leading is None or array.size == 0:
+        return np.ones(array.shape, dtype=bool)
+    ranges, unicode_digits = leading
+    codes = _codes(array)
+    mask = np.zeros(array.size, dtype=bool)
+    for low, high in ranges:
+        mask |= ((codes >= low) & (codes <= high)).any(axis=1)
+    if unicode_digits:
+        # \d also matches non-ASCII digits; leave those rows to the regex.
+        mask |= (codes > 127).any(axis=1)
+    return mask.reshape(array.shape)
+
+
+def findall_batch(pattern, values, flags=0):
+    """
+    Evaluates `re.findall(pattern, value)` for every value in a column.
+
+    The regex only runs on rows selected by `candidate_mask()`; every other
+    row gets an empty list.
+
+    Args:
+        pattern (str or re.Pattern): The regex pattern to find.
+        values (list or numpy.ndarray): The strings to search.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Returns:
+        list: One list of matches per row.
+    """
+    compiled = _compile(pattern, flags)
+    array = _as_array(values).ravel()
+    results = [[] for _ in range(array.size)]
+    findall = compiled.findall
+    for i in np.flatnonzero(candidate_mask(compiled, array)):
+        results[i] = findall(str(array[i]))
+    return results
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("--- Vectorized Batch Matching ---")
+    rng = random.Random(0)
+    words = ["Hello", "World", "Python", "regex", "data"]
+    rows = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 6))) for _ in range(1_000_000)]
+    array = np.array(rows)
+    print(f"Rows: {len(rows)}")
+
+    for pattern, vectorized, per_row in [
+        (r"^Hello.*World$", match_mask, lambda p: [p.match(row) is not None for row in rows]),
+        (r"\d+", findall_batch, lambda p: [p.findall(row) for row in rows]),
+    ]:
+        compiled = re.compile(pattern)
+        start = time.perf_counter()
+        expected = per_row(compiled)
+        loop_time = time.perf_counter() - start
+        start = time.perf_counter()
+        found = vectorized(compiled, array)
+        batch_time = time.perf_counter() - start
+        assert list(found) == expected
+        print(f"{vectorized.__name__}('{pattern}'): re loop {loop_time * 1000:.0f} ms, batch {batch_time * 1000:.0f} ms")
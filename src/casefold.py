@@ -0,0 +1,226 @@
+"""
+casefold.py
+
+This module provides a fast path for case-insensitive searches of plain
+literals, such as `re.findall('python', text, re.IGNORECASE)`. Instead of
+letting the regex engine compare every character case-insensitively, the
+document is case-folded once and searched with `str.find()`; hits map
+straight back to spans of the original text. Folding costs more than one
+regex search, so this only pays off when a document is searched for
+several terms.
+"""
+
+import functools
+import re
+
+from _sre import unicode_tolower
+
+from src.analysis import literal_string
+
+try:
+    from re._casefix import _EXTRA_CASES
+except ImportError:  # Python < 3.11
+    from sre_compile import _ignorecase_fixes as _EXTRA_CASES
+
+
+@functools.lru_cache(maxsize=None)
+def _fold_char(char):
+    """
+    Returns the representative of a character's IGNORECASE equivalence class.
+
+    `re` compares characters one at a time by their simple lowercase mapping,
+    plus a few extra equivalences (e.g. 's' and the long s 'ſ'). Unlike
+    `str.casefold()`, which turns 'ß' into 'ss' and 'İ' into 'i̇', this never
+    changes the length of the text, so folded offsets are original offsets.
+    """
+    lower = unicode_tolower(ord(char))
+    return chr(min((lower, *_EXTRA_CASES.get(lower, ()))))
+
+
+def fold(text):
+    """
+    Folds a string so that equal folded text means an IGNORECASE match.
+
+    Args:
+        text (str): The string to fold.
+
+    Returns:
+        str: The folded string, with the same length as `text`.
+    """
+    if not text.isascii():
+        # str.lower() already folds all but a few dozen characters the way
+        # IGNORECASE does; replace those first (their folded forms are
+        # lowercase, so lower() leaves them alone).
+        for char in set(text):
+            if char.lower() != _fold_char(char):
+                text = text.replace(char, _fold_char(char))
+    return text.lower()
+
+
+def _findall(pattern, text, flags):
+    """Runs `re.findall()` for a pattern string or a compiled pattern."""
+    if isinstance(pattern, re.Pattern):
+        return pattern.findall(text)
+    return re.findall(pattern, text, flags)
+
+
+class CaseFoldedText:
+    """
+    A document together with its folded form, for repeated literal searches.
+
+    Folding the document is the expensive step, so build one of these per
+    document and query it for as many terms as needed.
+
+    Args:
+        text (str): The document to search.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.folded = fold(text)
+
+    def find_spans(self, pattern, flags=re.IGNORECASE):
+        """
+        Finds all non-overlapping matches of a literal pattern.
+
+        Args:
+            pattern (str or re.Pattern): A pattern made only of literal characters.
+            flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+        Without `re.IGNORECASE` the literal is matched exactly, as `re` would.
+
+        Returns:
+            list: (start, end) spans in the original text.
+
+        Raises:
+            ValueError: If the pattern is not a plain literal, or is combined
+                with `re.ASCII` or `re.LOCALE`, which fold case differently.
+        """
+        literal = literal_string(pattern, flags)
+        if literal is None:
+            raise ValueError(f"Pattern {pattern!r} is not a plain literal.")
+        if isinstance(pattern, re.Pattern):
+            flags = pattern.flags
+        if not flags & re.IGNORECASE:
+            haystack, term = self.text, literal
+        elif flags & (re.ASCII | re.LOCALE):
+            raise ValueError("Only Unicode IGNORECASE searches can use the folded text.")
+        else:
+            haystack, term = self.folded, fold(literal)
+        size = len(term)
+        find = haystack.find
+        spans = []
+        i = find(term)
+        while i != -1:
+            spans.append((i, i + size))
+            i = find(term, i + size)
+        return spans
+
+    def findall(self, pattern, flags=re.IGNORECASE):
+        """
+        Equivalent of `re.findall(pattern, text, flags)` that uses the fast
+        path when the pattern is a case-insensitive literal.
+
+        Args:
+            pattern (str or re.Pattern): The regex pattern to find.
+            flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+        Returns:
+            list: A list of all found matches.
+        """
+        if _is_fast_path(pattern, flags):
+            text = self.text
+            return [text[start:end] for start, end in self.find_spans(pattern, flags)]
+        return _findall(pattern, self.text, flags)
+
+    def count(self, pattern, flags=re.IGNORECASE):
+        """
+        Counts the non-overlapping matches of a pattern.
+
+        Args:
+            pattern (str or re.Pattern): The regex pattern to count.
+            flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+        Returns:
+            int: The number of matches.
+        """
+        if _is_fast_path(pattern, flags):
+            # str.count() also counts non-overlapping occurrences, left to right.
+            return self.folded.count(fold(literal_string(pattern, flags)))
+        return len(self.findall(pattern, flags))
+
+
+def _is_fast_path(pattern, flags):
+    """Checks whether a pattern is a literal searched with Unicode IGNORECASE."""
+    if isinstance(pattern, re.Pattern):
+        flags = pattern.flags
+    if not flags & re.IGNORECASE or flags & (re.ASCII | re.LOCALE):
+        return False
+    return literal_string(pattern, flags) is not None
+
+
+# (text, CaseFoldedText or None) for the last document passed to
+# `findall_ignorecase()`. It is only ever replaced as a whole, so threads
+# never see one document paired with another's fold.
+_recent = (None, None)
+
+
+def findall_ignorecase(pattern, text, flags=re.IGNORECASE):
+    """
+    Equivalent of `re.findall(pattern, text, flags)` for repeated searches
+    of the same document.
+
+    Folding a document costs about twice as much as one `re.findall()` over
+    it, so the first search of a document just runs `re`. Searching the same
+    string again folds it once, and later literal searches reuse the fold
+    until a different document is searched. Only that one document is kept.
+    To query a known document many times, use `CaseFoldedText` directly.
+
+    Args:
+        pattern (str or re.Pattern): The regex pattern to find.
+        text (str): The string to search within.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Returns:
+        list: A list of all found matches.
+    """
+    global _recent
+    recent_text, document = _recent
+    if recent_text is not text:
+        _recent = (text, None)
+        return _findall(pattern, text, flags)
+    if not _is_fast_path(pattern, flags):
+        return _findall(pattern, text, flags)
+    if document is None or document.text is not text:
+        document = CaseFoldedText(text)
+        _recent = (text, document)
+    return document.findall(pattern, flags)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("--- Case-Folded Literal Search ---")
+    rng = random.Random(0)
+    words = "the of and to in is that for it as was with be by on not he this are or his from at which".split()
+    words += ["Python", "PYTHON", "Straße", "İstanbul"]
+    text = " ".join(rng.choice(words) for _ in range(1_000_000))
+    terms = ["python", "straße", "istanbul", "regex", "data"]
+    print(f"Text size: {len(text) / 1e6:.1f} MB, {len(terms)} terms searched one after another")
+
+    start = time.perf_counter()
+    expected = [re.findall(term, text, re.IGNORECASE) for term in terms]
+    re_time = time.perf_counter() - start
+    start = time.perf_counter()
+    found = [findall_ignorecase(term, text) for term in terms]
+    fast_time = time.perf_counter() - start
+    assert found == expected
+    print(f"findall: re {re_time * 1000:.0f} ms, findall_ignorecase {fast_time * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    document = CaseFoldedText(text)
+    counts = [document.count(term) for term in terms]
+    count_time = time.perf_counter() - start
+    assert counts == [len(matches) for matches in expected]
+    print(f"count: re {re_time * 1000:.0f} ms, CaseFoldedText (including the fold) {count_time * 1000:.0f} ms")
@@ -0,0 +1,240 @@
+"""
+client.py
+
+This module talks to the matching daemon in daemon.py. It is kept apart from
+the server because a shell pipeline starts a new client process for every
+batch, so its imports are part of every round trip: the command line client
+loads only `_socket` (the C module behind `socket`, which itself imports
+enum and selectors) and struct.
+
+Start a server once, then pipe lines through a client:
+
+    python -m src.daemon serve /tmp/regex.sock &
+    cat emails.txt | python -S src/client.py /tmp/regex.sock email
+    cat tweets.txt | python -S src/client.py /tmp/regex.sock hashtags --matching
+
+The client prints one JSON result per input line, or with `--matching` only
+the input lines whose result is true or non-empty, like grep. Run as a
+script with `-S` (no site-packages), it costs little more than a bare
+interpreter, about 60% of a fresh process that imports `re` and compiles
+its pattern; `python -m src.client` works too, but `-m` itself imports
+several modules and ends up no faster than the fresh process (run
+`python -m src.daemon` for numbers).
+
+Every message on the socket is preceded by its length as a 4-byte
+big-endian integer. `MatchClient` sends JSON requests (see daemon.py); the
+command line client sends text requests, whose first line is the check and
+the output format and whose other lines are the items, and gets back the
+text to print after an `ok` line, or a line starting with `error:`. That
+way it never imports json, which costs more than compiling the pattern.
+"""
+
+import _socket
+import struct
+import sys
+import time
+
+# Each message is preceded by its length, as a 4-byte big-endian integer.
+HEADER = struct.Struct("!I")
+MAX_FRAME = 16 * 1024 * 1024
+BATCH_SIZE = 1000
+
+
+def _connect(path, timeout=None):
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _send_payload(sock, data):
+    if len(data) > MAX_FRAME:
+        raise ValueError(f"a message of {len(data)} bytes exceeds the limit of {MAX_FRAME} bytes")
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def send_frame(sock, message):
+    """
+    Sends one length-prefixed JSON message.
+
+    Args:
+        sock (socket.socket): A connected socket.
+        message (dict): The message to send.
+
+    Raises:
+        ValueError: If the encoded message is larger than `MAX_FRAME`.
+    """
+    import json
+
+    _send_payload(sock, json.dumps(message).encode("utf-8"))
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_payload(sock):
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    return _recv_exactly(sock, HEADER.unpack(header)[0])
+
+
+def recv_frame(sock):
+    """
+    Receives one length-prefixed JSON message.
+
+    Args:
+        sock (socket.socket): A connected socket.
+
+    Returns:
+        dict or None: The message, or None if the peer closed the connection.
+    """
+    import json
+
+    data = _recv_payload(sock)
+    return None if data is None else json.loads(data)
+
+
+class MatchClient:
+    """
+    A blocking client for `daemon.MatchServer`.
+
+    Args:
+        path (str): Filesystem path of the server's socket.
+        timeout (float): Socket timeout in seconds, or None to wait forever.
+    """
+
+    def __init__(self, path, timeout=None):
+        self._sock = _connect(path, timeout)
+        self._next_id = 0
+
+    def close(self):
+        """Closes the connection."""
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def check(self, name, items):
+        """
+        Runs one check over a batch of strings.
+
+        Args:
+            name (str): The check, such as 'email' or 'hashtags'.
+            items (list): The strings to check.
+
+        Returns:
+            list: One result per item.
+        """
+        return self.pipeline([(name, items)])[0][0]
+
+    def pipeline(self, batches):
+        """
+        Sends every batch before reading any reply, then collects the replies.
+
+        Args:
+            batches (iterable): (check name, list of strings) pairs.
+
+        Returns:
+            list: (results, round_trip_ms, server_ms) for each batch, in order.
+                `round_trip_ms` is measured by the client from sending the
+                request to receiving its reply.
+
+        Raises:
+            ValueError: If the server rejected a request, or a batch is
+                larger than `MAX_FRAME` once encoded.
+            ConnectionError: If the server closed the connection.
+        """
+        sent = {}
+        for name, items in batches:
+            self._next_id += 1
+            sent[self._next_id] = time.perf_counter()
+            send_frame(self._sock, {"id": self._next_id, "check": name, "items": list(items)})
+        replies = {}
+        while len(replies) < len(sent):
+            reply = recv_frame(self._sock)
+            if reply is None:
+                raise ConnectionError("the server closed the connection")
+            if reply.get("id") not in sent:
+                # An error about the connection itself, not about one request.
+                raise ValueError(reply.get("error", "unexpected reply"))
+            replies[reply["id"]] = (reply, (time.perf_counter() - sent[reply["id"]]) * 1000)
+        results = []
+        for request_id in sent:
+            reply, round_trip = replies[request_id]
+            if "error" in reply:
+                raise ValueError(reply["error"])
+            results.append((reply["results"], round_trip, reply["server_ms"]))
+        return results
+
+
+def _batches(lines, size):
+    batch = []
+    for line in lines:
+        batch.append(line.rstrip("\r\n"))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main(argv, stdin, stdout):
+    """
+    Runs the command line client: checks every line of `stdin`.
+
+    Args:
+        argv (list): [socket path, check name], optionally with `--matching`.
+        stdin (file): The lines to check.
+        stdout (file): Where the results are written.
+
+    Returns:
+        int: The exit status.
+
+    Raises:
+        ValueError: If the server rejected a request.
+        ConnectionError: If the server closed the connection.
+    """
+    output = "matching" if "--matching" in argv else "results"
+    args = [arg for arg in argv if arg != "--matching"]
+    if len(args) != 2 or any(arg.startswith("-") for arg in args):
+        print("usage: client.py SOCKET CHECK [--matching] < lines", file=sys.stderr)
+        return 2
+    path, name = args
+    sock = _connect(path)
+    try:
+        for batch in _batches(stdin, BATCH_SIZE):
+            _send_payload(sock, "\n".join([f"{name} {output}", *batch]).encode("utf-8"))
+            reply = _recv_payload(sock)
+            if reply is None:
+                raise ConnectionError("the server closed the connection")
+            status, _, text = reply.decode("utf-8").partition("\n")
+            if status != "ok":
+                raise ValueError(status.removeprefix("error: "))
+            stdout.write(text)
+    finally:
+        sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv[1:], sys.stdin, sys.stdout))
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        sys.exit(1)
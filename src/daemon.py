@@ -0,0 +1,359 @@
+"""
+daemon.py
+
+This module keeps compiled patterns warm in a long-running local server, so
+shell pipelines that check a few strings at a time (exercise 10's email
+validation, exercise 11's hashtags) stop paying for interpreter startup and
+pattern compilation on every batch.
+
+A `MatchServer` listens on a Unix domain socket and hands each batch to a
+pool of worker processes that compiled every pattern when they started.
+Start one with `python -m src.daemon serve PATH` and talk to it with the
+client in client.py, from Python or from a shell pipeline.
+
+Every message is a JSON object preceded by its length as a 4-byte
+big-endian integer (the command line client also sends plain text
+requests, described in client.py). A connection may send any number of
+requests without waiting for the replies (pipelining); each reply carries
+the id of its request and the time the server spent on it, and replies may
+arrive out of order.
+
+    Request: {"id": 1, "check": "email", "items": ["a@b.co", "nope"]}
+    Reply:   {"id": 1, "results": [true, false], "server_ms": 0.21}
+             {"id": 1, "error": "unknown check 'mail'", "server_ms": 0.01}
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+
+from src.client import HEADER, MAX_FRAME
+
+# name -> (pattern, flags, mode). "match" answers `bool(re.match(...))` for
+# each item, "findall" answers `re.findall(...)`, as in solutions.py.
+CHECKS = {
+    "digits": (r"\d+", 0, "findall"),  # Exercise 1
+    "greeting": (r"^Hello.*World$", 0, "match"),  # Exercise 2
+    "repeated": (r"\b(\w+)\s+\1\b", re.IGNORECASE, "findall"),  # Exercise 9
+    "email": (r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", 0, "match"),  # Exercise 10
+    "hashtags": (r"#([a-zA-Z0-9_]+)", 0, "findall"),  # Exercise 11
+}
+
+# Compiled checks of the current worker process, filled by `_init_worker()`.
+_compiled = {}
+
+
+def _init_worker(checks, ready=None):
+    """Compiles every check once, when a worker process starts."""
+    for name, (pattern, flags, mode) in checks.items():
+        _compiled[name] = (re.compile(pattern, flags), mode)
+    if ready is not None:
+        ready.release()
+
+
+def _run_check(name, items):
+    """Runs a compiled check over a batch of strings, inside a worker."""
+    pattern, mode = _compiled[name]
+    if mode == "match":
+        return [pattern.match(item) is not None for item in items]
+    return [pattern.findall(item) for item in items]
+
+
+class MatchServer:
+    """
+    A Unix domain socket server backed by a pool of pre-warmed workers.
+
+    The worker processes start (and compile their patterns) in `start()`,
+    before the socket accepts connections, so the first request is as fast
+    as any other. The socket is served from a background thread; use the
+    server as a context manager, or call `serve_forever()` from a script.
+
+    Args:
+        path (str): Filesystem path of the socket.
+        workers (int): Number of worker processes; defaults to the CPU count.
+        checks (dict): name -> (pattern, flags, mode), as in `CHECKS`.
+        timeout (float): Seconds to wait for a batch before replying with an
+            error, or None to wait forever. A worker that dies (killed, out
+            of memory) takes its batch with it, and the pool never reports
+            that batch again; a runaway pattern keeps its worker busy.
+
+    Raises:
+        re.error: If a check's pattern does not compile.
+        ValueError: If a check's mode is not 'match' or 'findall'.
+    """
+
+    def __init__(self, path, workers=None, checks=None, timeout=60.0):
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.checks = dict(CHECKS if checks is None else checks)
+        # A check that fails in a worker would kill it, and the pool would
+        # keep respawning it, so validate everything here first.
+        for name, (pattern, flags, mode) in self.checks.items():
+            re.compile(pattern, flags)
+            if mode not in ("match", "findall"):
+                raise ValueError(f"check {name!r} has unknown mode {mode!r}")
+        self._pool = None
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+
+    def start(self):
+        """Starts the workers, waits until they are warm, then starts listening."""
+        # "spawn" avoids forking a process that may already run threads.
+        context = multiprocessing.get_context("spawn")
+        ready = context.Semaphore(0)
+        self._pool = context.Pool(self.workers, _init_worker, (self.checks, ready))
+        for _ in range(self.workers):
+            ready.acquire()
+
+        started = threading.Event()
+        failure = []
+        self._thread = threading.Thread(target=self._run, args=(started, failure), daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            self._shutdown_pool()
+            raise failure[0]
+        return self
+
+    def _run(self, started, failure):
+        try:
+            asyncio.run(self._serve(started))
+        except Exception as exc:
+            failure.append(exc)
+            started.set()
+
+    async def _serve(self, started):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = self._loop.create_future()
+        server = await asyncio.start_unix_server(self._handle, path=self.path)
+        started.set()
+        async with server:
+            await self._stopped
+
+    def stop(self):
+        """Stops listening, shuts the workers down and removes the socket file."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopped.set_result, None)
+        self._thread.join()
+        self._thread = None
+        self._shutdown_pool()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _shutdown_pool(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def serve_forever(self):
+        """Starts the server and blocks until interrupted with Ctrl+C."""
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def _handle(self, reader, writer):
+        """Reads requests from one connection until it closes."""
+        pending = set()
+        try:
+            while True:
+                try:
+                    (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    if length > MAX_FRAME:
+                        # The frame is not read, so nothing after it can be either.
+                        error = {"id": None, "error": f"a message of {length} bytes exceeds the limit of {MAX_FRAME} bytes"}
+                        data = json.dumps(error).encode("utf-8")
+                        writer.write(HEADER.pack(len(data)) + data)
+                        break
+                    data = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                # Keep reading while this request runs: that is what lets
+                # a client pipeline its requests.
+                task = asyncio.ensure_future(self._reply(data, time.perf_counter(), writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            writer.close()
+
+    async def _reply(self, data, received, writer):
+        if data.lstrip()[:1] == b"{":
+            data = await self._json_reply(data, received)
+        else:
+            data = await self._text_reply(data)
+        writer.write(HEADER.pack(len(data)) + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass  # The client went away; its other replies are dropped too.
+
+    def _validate(self, name, items):
+        if name not in self.checks:
+            raise ValueError(f"unknown check {name!r}")
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise ValueError("'items' must be a list of strings")
+
+    async def _json_reply(self, data, received):
+        request_id = None
+        try:
+            request = json.loads(data)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+            request_id = request.get("id")
+            name, items = request.get("check"), request.get("items")
+            self._validate(name, items)
+            reply = {"id": request_id, "results": await self._submit(name, items)}
+        except Exception as exc:
+            reply = {"id": request_id, "error": str(exc)}
+        reply["server_ms"] = (time.perf_counter() - received) * 1000
+        return json.dumps(reply).encode("utf-8")
+
+    async def _text_reply(self, data):
+        """Answers a text request from the command line client (see client.py)."""
+        try:
+            header, *items = data.decode("utf-8").split("\n")
+            name, _, output = header.partition(" ")
+            self._validate(name, items)
+            if output not in ("results", "matching"):
+                raise ValueError(f"unknown output {output!r}")
+            results = await self._submit(name, items)
+        except Exception as exc:
+            return f"error: {exc}\n".encode("utf-8")
+        if output == "matching":
+            lines = [item for item, result in zip(items, results) if result]
+        else:
+            lines = [json.dumps(result) for result in results]
+        return "".join(f"{line}\n" for line in ["ok", *lines]).encode("utf-8")
+
+    async def _submit(self, name, items):
+        """Runs a check in the pool and waits for its result."""
+        loop = self._loop
+        future = loop.create_future()
+
+        def settle(value, failed):
+            if not future.done():
+                if failed:
+                    future.set_exception(value)
+                else:
+                    future.set_result(value)
+
+        # The pool calls these from its result thread, not the event loop.
+        self._pool.apply_async(
+            _run_check, (name, items),
+            callback=lambda value: loop.call_soon_threadsafe(settle, value, False),
+            error_callback=lambda exc: loop.call_soon_threadsafe(settle, exc, True),
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"check {name!r} timed out after {self.timeout} s") from None
+
+
+def _benchmark():
+    import statistics
+    import subprocess
+    import sys
+    import tempfile
+
+    from src.client import MatchClient
+
+    print("--- Pre-warmed Matching Daemon vs. Fresh Processes ---")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    emails = ["test@example.com", "invalid-email", "user.name@domain.co.uk", "a@b.c"]
+
+    def median_process_ms(command):
+        times = []
+        for _ in range(20):
+            start = time.perf_counter()
+            subprocess.run(command, input="\n".join(emails), cwd=root, capture_output=True, text=True, check=True)
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "regex.sock")
+        with MatchServer(path, workers=2):
+            with MatchClient(path) as client:
+                round_trips = []
+                for _ in range(2000):
+                    start = time.perf_counter()
+                    client.check("email", emails)
+                    round_trips.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                replies = client.pipeline([("email", emails), ("hashtags", ["#python is #fun"])] * 1000)
+                pipelined = time.perf_counter() - start
+                server_ms = statistics.median(server for _, _, server in replies)
+            # What a shell pipeline runs for each batch.
+            client_script = median_process_ms([sys.executable, "-S", os.path.join("src", "client.py"), path, "email"])
+            client_module = median_process_ms([sys.executable, "-m", "src.client", path, "email"])
+
+    # The baseline: a new interpreter that compiles the pattern itself.
+    script = (
+        "import re, sys\n"
+        "pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{2,}$')\n"
+        "print([pattern.match(line) is not None for line in sys.stdin.read().splitlines()])\n"
+    )
+    fresh = median_process_ms([sys.executable, "-c", script])
+    fresh_no_site = median_process_ms([sys.executable, "-S", "-c", script])
+    bare = median_process_ms([sys.executable, "-c", "pass"])
+
+    print(f"Batch of {len(emails)} emails, median of {len(round_trips)} round trips: {statistics.median(round_trips):.3f} ms"
+          f" (p99 {sorted(round_trips)[int(len(round_trips) * 0.99)]:.3f} ms)")
+    print(f"Pipelined: {len(replies)} requests in {pipelined * 1000:.0f} ms, median server time {server_ms:.1f} ms (mostly queueing)")
+    print("Median of 20 processes per batch:")
+    print(f"  python -S src/client.py:  {client_script:.1f} ms")
+    print(f"  python -m src.client:     {client_module:.1f} ms")
+    print(f"  fresh process:            {fresh:.1f} ms")
+    print(f"  fresh process with -S:    {fresh_no_site:.1f} ms")
+    print(f"  python -c pass:           {bare:.1f} ms")
+
+
+def main(argv=None):
+    """
+    Runs the command line interface.
+
+    `python -m src.daemon serve PATH [--workers N] [--timeout SECONDS]` serves `CHECKS` on a
+    socket until it gets Ctrl+C or SIGTERM; `python -m src.daemon benchmark`
+    (the default) compares the daemon with fresh processes.
+
+    Args:
+        argv (list): The arguments, defaulting to `sys.argv[1:]`.
+    """
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(prog="python -m src.daemon")
+    commands = parser.add_subparsers(dest="command")
+    serve = commands.add_parser("serve", help="serve the checks on a Unix domain socket")
+    serve.add_argument("path", help="filesystem path of the socket")
+    serve.add_argument("--workers", type=int, help="number of worker processes (default: CPU count)")
+    serve.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for a batch (default: 60)")
+    commands.add_parser("benchmark", help="compare the daemon with fresh processes")
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        # Stop cleanly, removing the socket file, when killed from a shell.
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        MatchServer(args.path, args.workers, timeout=args.timeout).serve_forever()
+    else:
+        _benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+prefilter.py
+
+This module screens text with cheap string checks before handing it to the
+regex engine. Most patterns contain literals that any match must include:
+exercise 5's `User '...' performed '...'`, exercise 2's `^Hello.*World$`
+(which must also start and end with those words), or exercise 6's
+`<b>(.*?)</b>`. When most lines do not match, testing those literals with
+`in`, `startswith()` and `endswith()` skips the majority of regex calls.
+"""
+
+import functools
+import re
+
+from src.analysis import parse_pattern, required_literals, sre_parse
+
+
+def _literal_run(nodes):
+    """Returns the text of the leading LITERAL nodes."""
+    run = []
+    for op, av in nodes:
+        if op is not sre_parse.LITERAL:
+            break
+        run.append(chr(av))
+    return "".join(run)
+
+
+class PrefilteredPattern:
+    """
+    A compiled pattern that only runs when a string passes a literal screen.
+
+    Args:
+        pattern (str, bytes or re.Pattern): The regex pattern.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+    Attributes:
+        pattern (re.Pattern): The compiled pattern.
+        prefix (str or bytes): Text a string must start with, for `search()`.
+        match_prefix (str or bytes): Text a string must start with, for `match()`.
+        suffix (str or bytes): Text a string must end with (before a final
+            newline if `suffix_newline` is True).
+        clauses (list): Tuples of literals; a string must contain one literal
+            from every tuple (see `analysis.required_literals()`). Literals
+            have the same type as the pattern.
+    """
+
+    def __init__(self, pattern, flags=0):
+        self.pattern = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+        self.prefix = self.match_prefix = self.suffix = ""
+        self.suffix_newline = False
+        self.clauses = []
+        if not self.pattern.flags & re.IGNORECASE:
+            self._find_literals()
+        if isinstance(self.pattern.pattern, bytes):
+            # The parse tree holds byte values, so Latin-1 maps them back exactly.
+            self.prefix, self.match_prefix, self.suffix = (
+                literal.encode("latin-1") for literal in (self.prefix, self.match_prefix, self.suffix)
+            )
+            self.clauses = [tuple(literal.encode("latin-1") for literal in clause) for clause in self.clauses]
+        self._newline = "\n" if isinstance(self.pattern.pattern, str) else b"\n"
+
+    def _find_literals(self):
+        """Fills in the prefixes, suffix and clauses from the parse tree."""
+        multiline = self.pattern.flags & re.MULTILINE
+        nodes = list(parse_pattern(self.pattern))
+        starts = [sre_parse.AT_BEGINNING_STRING] + ([] if multiline else [sre_parse.AT_BEGINNING])
+        if nodes and nodes[0][0] is sre_parse.AT and nodes[0][1] in (sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING):
+            # `match()` is anchored anyway, even for `^` in MULTILINE mode.
+            self.match_prefix = _literal_run(nodes[1:])
+            if nodes[0][1] in starts:
+                self.prefix = self.match_prefix
+        else:
+            self.match_prefix = _literal_run(nodes)
+        if nodes and nodes[-1][0] is sre_parse.AT:
+            end = nodes[-1][1]
+            if end is sre_parse.AT_END_STRING or (end is sre_parse.AT_END and not multiline):
+                self.suffix = _literal_run(reversed(nodes[:-1]))[::-1]
+                self.suffix_newline = end is sre_parse.AT_END
+        unique = set(required_literals(self.pattern))
+        singles = [clause[0] for clause in unique if len(clause) == 1]
+        # A clause is implied by any single literal that contains one of its
+        # strings (exercise 5's "'" by "] User '"), so testing it is wasted work.
+        unique = {
+            clause for clause in unique
+            if not any(literal in single and clause != (single,) for literal in clause for single in singles)
+        }
+        # Longer literals are rarer, so they reject more strings per check.
+        self.clauses = sorted(unique, key=lambda clause: (-min(map(len, clause)), clause))
+
+    def _passes(self, text, prefix):
+        if prefix and not text.startswith(prefix):
+            return False
+        if self.suffix and not text.endswith(self.suffix):
+            if not (self.suffix_newline and text.endswith(self.suffix + self._newline)):
+                return False
+        for clause in self.clauses:
+            if len(clause) == 1:
+                if clause[0] not in text:
+                    return False
+            elif not any(literal in text for literal in clause):
+                return False
+        return True
+
+    def screen(self, text):
+        """
+        Checks whether `text` can contain a match, without running the regex.
+
+        Args:
+            text (str): The string to check.
+
+        Returns:
+            bool: False only if `search()` is certain to find nothing.
+        """
+        return self._passes(text, self.prefix)
+
+    def search(self, text):
+        """Equivalent of `re.search()`, skipping the regex when the screen fails."""
+        return self.pattern.search(text) if self._passes(text, self.prefix) else None
+
+    def match(self, text):
+        """Equivalent of `re.match()`, skipping the regex when the screen fails."""
+        return self.pattern.match(text) if self._passes(text, self.match_prefix) else None
+
+    def findall(self, text):
+        """Equivalent of `re.findall()`, skipping the regex when the screen fails."""
+        return self.pattern.findall(text) if self._passes(text, self.prefix) else []
+
+    def search_lines(self, lines):
+        """
+        Searches each line of an iterable, such as an open log file.
+
+        Args:
+            lines (iterable): The lines to search.
+
+        Yields:
+            tuple: (line_number, match) for every line with a match, numbered from 1.
+        """
+        passes, search, prefix = self._passes, self.pattern.search, self.prefix
+        # Test the most selective literal inline: a method call per line
+        # costs about as much as the regex itself on short lines.
+        key = self.clauses[0][0] if self.clauses and len(self.clauses[0]) == 1 else self.pattern.pattern[:0]
+        for number, line in enumerate(lines, 1):
+            if key in line and passes(line, prefix):
+                match = search(line)
+                if match:
+                    yield number, match
+
+
+@functools.lru_cache(maxsize=128)
+def prefiltered(pattern, flags=0):
+    """
+    Returns a cached `PrefilteredPattern`, the way `re` caches compiled patterns.
+
+    Args:
+        pattern (str): The regex pattern.
+        flags (int): Regex flags.
+
+    Returns:
+        PrefilteredPattern: The screened pattern.
+    """
+    return PrefilteredPattern(pattern, flags)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("--- Required-Literal Prefilter ---")
+    rng = random.Random(0)
+    words = ["alpha", "beta", "gamma", "delta", "login", "error", "timeout", "session"]
+    lines = []
+    for i in range(200000):
+        if i % 25 == 0:
+            lines.append(f"I [2023-10-26 14:35:01] User 'user{i}' performed 'login'.")
+        else:
+            lines.append(" ".join(rng.choice(words) for _ in range(10)))
+
+    pattern = r"..\[(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] User '(?P<username>.*?)' performed '(?P<action>.*?)'."
+    compiled = re.compile(pattern)
+    screened = PrefilteredPattern(compiled)
+    print(f"Required literals: {screened.clauses}")
+
+    start = time.perf_counter()
+    plain = [m.group("username") for line in lines if (m := compiled.search(line))]
+    plain_time = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = [m.group("username") for _, m in screened.search_lines(lines)]
+    fast_time = time.perf_counter() - start
+    assert plain == fast
+    print(f"Matching lines: {len(fast)} of {len(lines)}")
+    print(f"re.search on every line: {plain_time * 1000:.1f} ms, prefiltered: {fast_time * 1000:.1f} ms")
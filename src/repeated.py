@@ -0,0 +1,210 @@
+"""
+repeated.py
+
+This module finds immediately repeated words ("the the", "Hello hello")
+without a backreference. Instead of the pattern `\\b(\\w+)\\s+\\1\\b`
+(exercise 9 and `demonstrate_backreferences()`), the text is split into
+whitespace-separated tokens once and each word is compared with its
+neighbour. That gives the same results as the regex, but also works on text
+that arrives in pieces and extends to "repeated within the last N words".
+It is not faster than CPython's regex on a whole string in memory.
+"""
+
+import itertools
+import operator
+import re
+
+from _sre import unicode_tolower
+
+from src.analysis import LazyPattern
+
+_LEADING_WORD = LazyPattern(r"\w*")
+_TRAILING_WORD = LazyPattern(r"\w*\Z")
+_WORD = LazyPattern(r"\w+")
+
+
+def _lower(text):
+    """
+    Lowercases text the way an IGNORECASE backreference compares it.
+
+    `\\1` compares characters by their simple lowercase mapping only, so,
+    unlike a literal, it does not equate 's' with the long s 'ſ' (see
+    `casefold.fold()`). `str.lower()` agrees except for 'İ', which it turns
+    into two characters, and 'Σ', which it lowers to 'ς' at the end of a word.
+    """
+    if not text.isascii():
+        for char in "\u0130\u03a3":
+            if char in text:
+                text = text.replace(char, chr(unicode_tolower(ord(char))))
+    return text.lower()
+
+
+def _pairs(tokens, consumed_first):
+    """
+    Finds adjacent tokens where a word is repeated across the whitespace.
+
+    Args:
+        tokens (list): Folded whitespace-separated tokens.
+        consumed_first (bool): True if the first token's word already closed
+            a repeat (so it cannot start another one).
+
+    Returns:
+        tuple: (indexes, trailing, single) where each index k means the
+            trailing word of token k is repeated by the leading word of
+            token k + 1, `trailing` maps each distinct token to its trailing
+            word, and `single` holds the tokens that are one whole word.
+    """
+    # Text has far fewer distinct tokens than tokens, so the word boundaries
+    # are worked out once per distinct token and then looked up in C.
+    leading, trailing, single = {}, {}, set()
+    for token in set(tokens):
+        lead = _LEADING_WORD.match(token).group()
+        if len(lead) == len(token):
+            leading[token] = trailing[token] = token
+            single.add(token)
+        else:
+            leading[token] = lead
+            # None never equals a leading word, so empty words cannot repeat.
+            trailing[token] = _TRAILING_WORD.search(token).group() or None
+    leads = map(leading.__getitem__, itertools.islice(tokens, 1, None))
+    trails = map(trailing.__getitem__, tokens)
+    found = itertools.compress(itertools.count(), map(operator.eq, trails, leads))
+    indexes = []
+    last = -1 if consumed_first else None
+    for k in found:
+        # A single-word token that closed a repeat cannot open the next one.
+        if last is not None and k == last + 1 and (k == 0 or tokens[k] in single):
+            continue
+        indexes.append(k)
+        last = k
+    return indexes, trailing, single
+
+
+def iter_repeated_words(chunks, ignorecase=True, window=1):
+    """
+    Finds repeated words in text that arrives in pieces, such as a file.
+
+    With `window=1` the result is exactly that of
+    `re.findall(r'\\b(\\w+)\\s+\\1\\b', text, re.IGNORECASE)` over the joined
+    text. With a larger window, a word also counts as repeated when it
+    matches any of the previous `window` words, as long as only whitespace
+    separates them. Either way, the word that closes a repeat starts a
+    fresh run, so 'a a a' reports 'a' once.
+
+    Args:
+        chunks (iterable): Pieces of text, in order (e.g. an open file).
+        ignorecase (bool): Compare words the way `re.IGNORECASE` does.
+        window (int): How many preceding words to compare against.
+
+    Yields:
+        str: The earlier occurrence of each repeated word.
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    carry = ""
+    previous = []  # Last complete (original, folded) token of the previous piece.
+    state = _WindowState(window) if window > 1 else None
+    consumed = False
+    for piece in itertools.chain(chunks, [None]):
+        if piece is None:
+            text, carry = carry, ""
+        else:
+            text = carry + piece
+            # A token touching the end of the piece may continue in the next one.
+            cut = len(text)
+            if text and not text[-1].isspace():
+                cut -= len(text.rsplit(None, 1)[-1])
+            text, carry = text[:cut], text[cut:]
+        originals = text.split()
+        if not originals:
+            continue
+        folded = _lower(text).split() if ignorecase else originals
+        if state is not None:
+            yield from state.feed(originals, folded)
+            continue
+        originals = previous[:1] + originals
+        folded = previous[1:] + folded
+        indexes, trailing, single = _pairs(folded, consumed)
+        for k in indexes:
+            # Lowercasing keeps lengths, so the word sits at the same offsets.
+            token = originals[k]
+            yield token[len(token) - len(trailing[folded[k]]):]
+        last = len(folded) - 1
+        consumed = bool(indexes) and indexes[-1] == last - 1 and folded[last] in single
+        previous = [originals[-1], folded[-1]]
+
+
+class _WindowState:
+    """Tracks the last N words of the current whitespace-separated run."""
+
+    def __init__(self, window):
+        self.window = window
+        self.recent = []  # Folded words, oldest first.
+        self.originals = {}  # Folded word -> original text of its latest occurrence.
+
+    def _reset(self):
+        self.recent.clear()
+        self.originals.clear()
+
+    def _word(self, original, key):
+        if key in self.originals:
+            yield self.originals[key]
+            self._reset()
+            return
+        self.recent.append(key)
+        self.originals[key] = original
+        if len(self.recent) > self.window:
+            del self.originals[self.recent.pop(0)]
+
+    def feed(self, originals, folded):
+        """Processes whitespace-separated tokens, yielding repeated words."""
+        for original, key in zip(originals, folded):
+            if key.isalnum():
+                yield from self._word(original, key)
+                continue
+            words = list(_WORD.finditer(key))
+            if not words or words[0].start() > 0:
+                self._reset()
+            for i, m in enumerate(words):
+                if i:
+                    self._reset()  # Punctuation between words ends the run.
+                yield from self._word(original[m.start():m.end()], m.group())
+            if not words or words[-1].end() < len(key):
+                self._reset()
+
+
+def find_repeated_words(text, ignorecase=True, window=1):
+    """
+    Finds repeated words in a string; see `iter_repeated_words()`.
+
+    Args:
+        text (str): The string to search.
+        ignorecase (bool): Compare words the way `re.IGNORECASE` does.
+        window (int): How many preceding words to compare against.
+
+    Returns:
+        list: The earlier occurrence of each repeated word.
+    """
+    return list(iter_repeated_words([text], ignorecase, window))
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("--- Repeated Words Without Backreferences ---")
+    rng = random.Random(0)
+    vocabulary = "the quick brown fox jumps over the lazy dog. The Dog, a an is it to of and".split()
+    text = " ".join(rng.choice(vocabulary) for _ in range(1_000_000))
+    print(f"Text size: {len(text) / 1e6:.1f} MB")
+
+    pattern = re.compile(r"\b(\w+)\s+\1\b", re.IGNORECASE)
+    start = time.perf_counter()
+    expected = pattern.findall(text)
+    regex_time = time.perf_counter() - start
+    start = time.perf_counter()
+    found = find_repeated_words(text)
+    token_time = time.perf_counter() - start
+    assert found == expected
+    print(f"Repeated words: {len(found)}")
+    print(f"Backreference regex: {regex_time * 1000:.0f} ms, token scan: {token_time * 1000:.0f} ms")
@@ -0,0 +1,91 @@
+"""
+streaming.py
+
+This module runs `re.finditer()`-style searches over file-like objects that
+are too large to read into memory. The stream is read in fixed-size chunks,
+and just enough of the previous chunk is kept to find matches that straddle
+a chunk boundary, so memory use does not depend on the size of the file.
+"""
+
+import re
+
+from src.analysis import findall_value, pattern_reach
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def stream_finditer(pattern, stream, flags=0, chunk_size=DEFAULT_CHUNK_SIZE, max_width=None):
+    """
+    Finds all matches of a pattern in a stream, reading it chunk by chunk.
+
+    A match attempt is only trusted once the buffer holds every character it
+    could look at; the rest of the buffer is carried over into the next
+    chunk. The result is the same as `re.finditer()` over the whole content.
+
+    Patterns that can match an unbounded number of characters (e.g. `\\d+`)
+    need `max_width`: a promise that no match attempt has to look more than
+    that many characters past its start.
+
+    Args:
+        pattern (str, bytes or re.Pattern): The regex pattern to find.
+        stream (file-like): An object whose `read(size)` returns str or bytes,
+            matching the type of the pattern.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+        chunk_size (int): How many characters to read at a time.
+        max_width (int, optional): Cap on how far a match attempt can look ahead.
+
+    Yields:
+        tuple: (start, end, value) for each match, where the offsets are
+            relative to the start of the stream and `value` is what
+            `re.findall()` would report.
+
+    Raises:
+        ValueError: If `chunk_size` is less than 1, or the pattern is
+            unbounded and no `max_width` is given.
+    """
+    if chunk_size < 1:
+        # read(0) returns nothing and read(-1) reads the whole stream.
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}.")
+    compiled = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+    behind, ahead = pattern_reach(compiled)
+    if max_width is not None:
+        ahead = max_width + 2
+    if ahead is None:
+        raise ValueError(
+            f"Pattern {compiled.pattern!r} can match an unbounded number of characters; "
+            "pass max_width to bound the overlap between chunks."
+        )
+
+    buffer = stream.read(chunk_size)
+    base = 0  # Stream offset of buffer[0].
+    pos = 0  # Next position in the buffer where a fresh match attempt starts.
+    skip_empty_at = None  # Set after an empty match, which cannot repeat in place.
+    while True:
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        # Attempts at or before `limit` see everything they need in the buffer.
+        limit = len(buffer) if eof else len(buffer) - ahead
+        last_end = pos
+        for m in compiled.finditer(buffer, pos):
+            start, end = m.span()
+            if start > limit:
+                break
+            if start == end == skip_empty_at:
+                continue
+            yield base + start, base + end, findall_value(m)
+            last_end = end
+            skip_empty_at = end if start == end else None
+        if eof:
+            return
+        # Every attempt up to `limit` has been made, so the next one starts after it.
+        if limit >= last_end:
+            pos, skip_empty_at = limit + 1, None
+        else:
+            pos = last_end
+        # Keep the characters that later attempts may look behind at.
+        cut = max(pos - behind, 0)
+        buffer = buffer[cut:] + chunk
+        base += cut
+        pos -= cut
+        if skip_empty_at is not None:
+            skip_empty_at -= cut
@@ -0,0 +1,427 @@
+"""
+trigram.py
+
+This module builds a persistent trigram index over a directory of files, so
+that regex searches only open the files that can possibly match instead of
+scanning every byte of the corpus on every query.
+
+For each file the index records which 3-byte sequences (trigrams) it
+contains. At query time the literals that every match must contain are
+taken from the pattern's parse tree, their trigrams are looked up, and the
+real `re` search only runs on files that contain all of them.
+
+The index is stored as immutable segment files plus a JSON manifest. Each
+`update()` indexes only new or modified files into a new segment and marks
+the previous versions of changed or removed files as deleted; `compact()`
+merges the segments back into one. Segments are read through `mmap`, so a
+query only touches the posting lists it needs.
+"""
+
+import array
+import bisect
+import mmap
+import os
+import re
+import struct
+from stat import S_ISREG
+
+from src.analysis import LazyPattern, findall_value, required_literals
+
+MAGIC = b"TRG1"
+READ_SIZE = 1 << 20
+SEGMENT_POSTINGS = 4_000_000
+_HEADER = struct.Struct("<4sII")
+_TRIGRAM = LazyPattern(rb".{3}", re.DOTALL)
+
+
+def file_trigrams(data):
+    """
+    Returns the set of trigrams in a byte string, as integers.
+
+    Args:
+        data (bytes): The content to split into trigrams.
+
+    Returns:
+        set: One integer per distinct 3-byte sequence.
+    """
+    grams = set()
+    # Three passes of non-overlapping 3-byte chunks, offset by 0, 1 and 2,
+    # cover every window while keeping the work inside the regex engine.
+    for offset in range(3):
+        grams.update(_TRIGRAM.findall(data, offset))
+    return {int.from_bytes(gram, "big") for gram in grams}
+
+
+def _read_trigrams(path):
+    """Returns the trigrams of a file, reading it `READ_SIZE` bytes at a time."""
+    grams = set()
+    tail = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_SIZE)
+            if not chunk:
+                break
+            # The last two bytes of the previous chunk start the trigrams
+            # that straddle the boundary.
+            data = tail + chunk
+            grams |= file_trigrams(data)
+            tail = data[-2:]
+    return grams
+
+
+def _literal_trigrams(literal):
+    """Returns the trigrams of a literal's UTF-8 encoding, or None if it is too short."""
+    data = literal.encode("utf-8")
+    if len(data) < 3:
+        return None
+    return {int.from_bytes(data[i:i + 3], "big") for i in range(len(data) - 2)}
+
+
+def walk_files(root, exclude=None, skipped=None):
+    """
+    Yields the regular files below a directory, with their stat results.
+
+    Entries that cannot be stat'ed (such as dangling symlinks) and anything
+    that is not a regular file are skipped, so one bad entry cannot stop a
+    walk over a large tree.
+
+    Args:
+        root (str): The directory to walk.
+        exclude (str, optional): A directory below `root` to leave out,
+            such as an index stored inside the tree it indexes.
+        skipped (list, optional): Receives the relative paths that were skipped.
+
+    Yields:
+        tuple: (relative path, os.stat_result) for each file.
+    """
+    excluded = os.path.realpath(exclude) if exclude is not None else None
+    for directory, subdirs, names in os.walk(root):
+        if excluded is not None:
+            subdirs[:] = [d for d in subdirs if os.path.realpath(os.path.join(directory, d)) != excluded]
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is None or not S_ISREG(stat.st_mode):
+                if skipped is not None:
+                    skipped.append(os.path.relpath(path, root))
+                continue
+            yield os.path.relpath(path, root), stat
+
+
+def _read_text(path):
+    """Reads a file the way searches see it, or returns None if it cannot be read."""
+    try:
+        with open(path, encoding="utf-8", errors="surrogateescape", newline="") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class _Segment:
+    """A memory-mapped, read-only segment: sorted trigrams and their posting lists."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, total = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a trigram index segment.")
+        self._view = view = memoryview(self._map)[_HEADER.size:]
+        width = array.array("I").itemsize
+        self.keys = view[:count * width].cast("I")
+        self.starts = view[count * width:(2 * count + 1) * width].cast("I")
+        self.postings = view[(2 * count + 1) * width:(2 * count + 1 + total) * width].cast("I")
+
+    def lookup(self, gram):
+        """Returns the ids of the files in this segment that contain `gram`."""
+        i = bisect.bisect_left(self.keys, gram)
+        if i == len(self.keys) or self.keys[i] != gram:
+            return []
+        return self.postings[self.starts[i]:self.starts[i + 1]].tolist()
+
+    def items(self):
+        """Yields (trigram, file ids) for every trigram in the segment."""
+        for i, gram in enumerate(self.keys):
+            yield gram, self.postings[self.starts[i]:self.starts[i + 1]].tolist()
+
+    def close(self):
+        self.keys.release()
+        self.starts.release()
+        self.postings.release()
+        self._view.release()
+        self._map.close()
+
+
+def _write_segment(path, postings):
+    """Writes {trigram: [file ids]} to a segment file."""
+    keys = array.array("I", sorted(postings))
+    starts = array.array("I", [0])
+    ids = array.array("I")
+    for gram in keys:
+        ids.extend(sorted(postings[gram]))
+        starts.append(len(ids))
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(keys), len(ids)))
+        keys.tofile(f)
+        starts.tofile(f)
+        ids.tofile(f)
+    os.replace(tmp, path)
+
+
+class TrigramIndex:
+    """
+    A persistent trigram index over the files below a root directory.
+
+    Segments are stored in native byte order, so an index directory should
+    be rebuilt rather than copied to a machine of different endianness.
+
+    Args:
+        index_dir (str): Directory holding the index; created if missing.
+        root (str): Directory whose files are indexed.
+        segment_postings (int): How many (trigram, file) postings `update()`
+            collects in memory before writing them out as a segment.
+    """
+
+    def __init__(self, index_dir, root, segment_postings=SEGMENT_POSTINGS):
+        # `json` compiles its own regexes on import, so it is only loaded
+        # once an index is actually opened.
+        import json
+
+        self.index_dir = index_dir
+        self.root = root
+        self.segment_postings = segment_postings
+        self.skipped = []
+        os.makedirs(index_dir, exist_ok=True)
+        self._manifest_path = os.path.join(index_dir, "manifest.json")
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, encoding="utf-8") as f:
+                self._manifest = json.load(f)
+        else:
+            self._manifest = {"files": {}, "segments": [], "deleted": [], "next_id": 0, "next_segment": 0}
+        self._segments = [_Segment(os.path.join(index_dir, name)) for name in self._manifest["segments"]]
+
+    def close(self):
+        """Releases the memory-mapped segments."""
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _save_manifest(self):
+        import json
+
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, self._manifest_path)
+
+    def update(self):
+        """
+        Brings the index up to date with the files below the root.
+
+        Only files that are new or whose size or modification time changed
+        are read, in chunks; they go into new segments, which are written
+        whenever `segment_postings` postings have been collected, so memory
+        stays bounded however large the tree is.
+
+        Entries that cannot be read (dangling symlinks, files without read
+        permission, ...) are left out of the index and listed in `skipped`;
+        if they were indexed before, they count as removed.
+
+        Returns:
+            tuple: (indexed, removed) counts of files.
+        """
+        files = self._manifest["files"]
+        deleted = set(self._manifest["deleted"])
+        seen = set()
+        postings = {}
+        pending = 0
+        indexed = 0
+        self.skipped = []
+        # Never index the index itself if it lives below the root.
+        for path, stat in walk_files(self.root, self.index_dir, self.skipped):
+            entry = files.get(path)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                seen.add(path)
+                continue
+            try:
+                grams = _read_trigrams(os.path.join(self.root, path))
+            except OSError:
+                self.skipped.append(path)
+                continue
+            seen.add(path)
+            if entry:
+                deleted.add(entry["id"])
+            file_id = self._manifest["next_id"]
+            self._manifest["next_id"] += 1
+            for gram in grams:
+                postings.setdefault(gram, []).append(file_id)
+            pending += len(grams)
+            files[path] = {"id": file_id, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            indexed += 1
+            if pending >= self.segment_postings:
+                self._flush(postings, deleted)
+                postings = {}
+                pending = 0
+        removed = [path for path in files if path not in seen]
+        for path in removed:
+            deleted.add(files.pop(path)["id"])
+        self._flush(postings, deleted)
+        return indexed, len(removed)
+
+    def _flush(self, postings, deleted):
+        """Writes collected postings as a new segment and saves the manifest."""
+        if postings:
+            name = f"segment-{self._manifest['next_segment']:06d}.idx"
+            self._manifest["next_segment"] += 1
+            _write_segment(os.path.join(self.index_dir, name), postings)
+            self._manifest["segments"].append(name)
+            self._segments.append(_Segment(os.path.join(self.index_dir, name)))
+        self._manifest["deleted"] = sorted(deleted)
+        self._save_manifest()
+
+    def compact(self):
+        """Merges all segments into one and drops the postings of deleted files."""
+        deleted = set(self._manifest["deleted"])
+        postings = {}
+        for segment in self._segments:
+            for gram, ids in segment.items():
+                live = [file_id for file_id in ids if file_id not in deleted]
+                if live:
+                    postings.setdefault(gram, []).extend(live)
+        old = self._manifest["segments"]
+        self.close()
+        name = f"segment-{self._manifest['next_segment']:06d}.idx"
+        self._manifest["next_segment"] += 1
+        _write_segment(os.path.join(self.index_dir, name), postings)
+        self._manifest.update(segments=[name], deleted=[])
+        self._save_manifest()
+        for old_name in old:
+            os.remove(os.path.join(self.index_dir, old_name))
+        self._segments = [_Segment(os.path.join(self.index_dir, name))]
+
+    def _files_with(self, gram):
+        ids = set()
+        for segment in self._segments:
+            ids.update(segment.lookup(gram))
+        return ids
+
+    def candidates(self, pattern, flags=0):
+        """
+        Lists the files that may contain a match, using only the index.
+
+        Args:
+            pattern (str or re.Pattern): The regex pattern.
+            flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+        Returns:
+            list: Relative paths, sorted.
+        """
+        live = {entry["id"]: path for path, entry in self._manifest["files"].items()}
+        postings = {}
+        result = None
+        for clause in required_literals(pattern, flags):
+            grams = [_literal_trigrams(literal) for literal in clause]
+            if any(g is None for g in grams):
+                continue  # A literal this short does not narrow anything down.
+            matched = set()
+            for literal_grams in grams:
+                for gram in literal_grams:
+                    if gram not in postings:
+                        postings[gram] = self._files_with(gram)
+                # Intersect the shortest posting lists first.
+                ids = set.intersection(*sorted((postings[gram] for gram in literal_grams), key=len))
+                matched |= ids
+            result = matched if result is None else result & matched
+        ids = live.keys() if result is None else result & live.keys()
+        return sorted(live[file_id] for file_id in ids)
+
+    def search(self, pattern, flags=0):
+        """
+        Finds all matches of a pattern in the indexed files.
+
+        The regex only runs on the files returned by `candidates()`. Files
+        are decoded as UTF-8; undecodable bytes are kept as surrogates, and
+        line endings are left as they are, so that the text searched is the
+        text that was indexed.
+
+        Args:
+            pattern (str or re.Pattern): The regex pattern.
+            flags (int): Regex flags, ignored when `pattern` is already compiled.
+
+        Yields:
+            tuple: (path, start, end, value) for each match, with character
+                offsets into the file and `value` as `re.findall()` reports it.
+        """
+        compiled = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+        for path in self.candidates(compiled):
+            text = _read_text(os.path.join(self.root, path))
+            if text is None:
+                continue  # Removed or made unreadable since the last update().
+            for m in compiled.finditer(text):
+                yield path, m.start(), m.end(), findall_value(m)
+
+
+def full_scan(root, pattern, flags=0, exclude=None):
+    """
+    Searches every file below `root` without an index, for comparison.
+
+    Args:
+        root (str): The directory to search.
+        pattern (str or re.Pattern): The regex pattern.
+        flags (int): Regex flags, ignored when `pattern` is already compiled.
+        exclude (str, optional): A directory to leave out, as `TrigramIndex`
+            leaves out its own index directory.
+
+    Yields:
+        tuple: (path, start, end, value), in the same order as `TrigramIndex.search()`.
+    """
+    compiled = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+    for path in sorted(path for path, _ in walk_files(root, exclude)):
+        text = _read_text(os.path.join(root, path))
+        if text is None:
+            continue
+        for m in compiled.finditer(text):
+            yield path, m.start(), m.end(), findall_value(m)
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+
+    print("--- Trigram Index vs. Full Scan ---")
+    rng = random.Random(0)
+    words = ["alpha", "beta", "gamma", "delta", "login", "logout", "error", "timeout", "user", "session"]
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as index_dir:
+        for i in range(2000):
+            lines = [" ".join(rng.choice(words) for _ in range(12)) for _ in range(50)]
+            if i % 100 == 0:
+                lines.append("[2023-10-26 14:35:01] User 'alice' performed 'checkout'.")
+            with open(os.path.join(root, f"log-{i:04d}.txt"), "w") as f:
+                f.write("\n".join(lines))
+
+        with TrigramIndex(index_dir, root) as index:
+            start = time.perf_counter()
+            index.update()
+            print(f"Indexed 2000 files in {time.perf_counter() - start:.2f}s")
+
+            pattern = r"User '(.*?)' performed 'checkout'"
+            start = time.perf_counter()
+            indexed = list(index.search(pattern))
+            indexed_time = time.perf_counter() - start
+            start = time.perf_counter()
+            scanned = list(full_scan(root, pattern))
+            scan_time = time.perf_counter() - start
+            assert indexed == scanned
+            print(f"Pattern: '{pattern}' ({len(indexed)} matches)")
+            print(f"Indexed search: {indexed_time * 1000:.1f} ms, full scan: {scan_time * 1000:.1f} ms")
@@ -0,0 +1,57 @@
+"""
+test_batch.py
+
+Pytest-based tests for the vectorized batch matching in batch.py.
+"""
+
+import pytest
+import random
+import re
+
+np = pytest.importorskip("numpy")
+
+from src.batch import candidate_mask, findall_batch, match_mask
+
+ROWS = ["Hello Python World", "Hello World", "Python World", "Hello World\n", "Hello\nWorld", "HelloWorld", "Helloorld", ""]
+
+def random_rows(count, seed):
+    pieces = ["Hello", "World", "Hel", "rld", " ", "\n", "x", "1", "#ai", "٣"]
+    rng = random.Random(seed)
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(0, 5))) for _ in range(count)]
+
+def test_match_mask_exercise_2():
+    mask = match_mask(r"^Hello.*World$", np.array(ROWS))
+    assert mask.dtype == bool
+    assert mask.tolist() == [True, True, False, True, False, True, False, False]
+
+def test_match_mask_agrees_with_re():
+    rows = random_rows(5000, seed=0)
+    patterns = [r"^Hello.*World$", r"Hello.*World", r"Hello$", r"\AHello.*?World\Z", r"Hello", r"H\w+", r".*World$", r"HelloWorldHelloWorldHello",
+                r"^$", r"Hel\n$", r".*\Z", r"Hello.*"]
+    for pattern in patterns:
+        for flags in [0, re.DOTALL, re.MULTILINE]:
+            expected = [re.match(pattern, row, flags) is not None for row in rows]
+            assert match_mask(pattern, rows, flags).tolist() == expected
+    # NumPy pads with NULs, so a NUL in the pattern is matched row by row.
+    assert match_mask("Hel\0", ["Hel", "Hel\0x"]).tolist() == [False, True]
+
+def test_findall_batch_exercise_1():
+    rows = ["The year is 2023, and 25 degrees.", "no digits", "lucky 7", ""]
+    assert findall_batch(r"\d+", rows) == [['2023', '25'], [], ['7'], []]
+    assert candidate_mask(r"\d+", rows).tolist() == [True, False, True, False]
+
+def test_findall_batch_agrees_with_re():
+    rows = random_rows(5000, seed=1)
+    for pattern in [r"\d+", r"#([a-zA-Z0-9_]+)", r"(\d)x", r"x*", r"(?i:h)el", r"(?i:x)\d", r"(?a:\d)"]:
+        for flags in [0, re.ASCII]:
+            assert findall_batch(pattern, rows, flags) == [re.findall(pattern, row, flags) for row in rows]
+
+def test_non_contiguous_and_2d_arrays():
+    rows = np.array(ROWS + ["1", "x2"])
+    assert candidate_mask(r"\d", rows[::2]).tolist() == [bool(re.search(r"\d", row)) for row in ROWS[::2] + ["1"]]
+    assert match_mask(r"^Hello.*World$", rows[1::3]).tolist() == [re.match(r"^Hello.*World$", row) is not None for row in rows[1::3]]
+    grid = rows.reshape(2, 5)
+    for pattern in [r"^Hello", r"^Hello.*World$", r"H\w+"]:
+        expected = [[re.match(pattern, row) is not None for row in line] for line in grid.tolist()]
+        assert match_mask(pattern, grid).tolist() == expected
+    assert match_mask(r"H\w+", rows[:4].reshape(2, 2)).tolist() == [[True, True], [False, True]]
@@ -0,0 +1,78 @@
+"""
+test_casefold.py
+
+Pytest-based tests for the case-folded literal search in casefold.py.
+"""
+
+import pytest
+import random
+import re
+from src.casefold import CaseFoldedText, findall_ignorecase, fold
+
+def test_findall_ignorecase_exercise_8():
+    text = "Python is great. I love python. Learning PYTHON is fun."
+    assert findall_ignorecase("python", text) == ['Python', 'python', 'PYTHON']
+    assert findall_ignorecase("python", text) == re.findall("python", text, re.IGNORECASE)
+
+def test_case_folded_text_reuses_fold_for_several_terms():
+    document = CaseFoldedText("Hello World, hello python")
+    assert document.findall("hello") == ['Hello', 'hello']
+    assert document.find_spans("WORLD") == [(6, 11)]
+    assert document.count("o") == 4
+
+def test_fold_keeps_length():
+    # str.casefold() would turn these into 'ss' and 'i̇'
+    assert fold("Straße İstanbul") == "straße istanbul"
+    assert len(fold("ßİ")) == 2
+
+def test_unicode_matches_agree_with_re():
+    alphabet = list("pythonPYTHON ßSsſİiıKkKΐΐςΣσµμ")
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        term = re.escape("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))))
+        expected = re.findall(term, text, re.IGNORECASE)
+        assert findall_ignorecase(term, text) == expected
+        assert findall_ignorecase(term, text) == expected  # Now from the folded text.
+        assert CaseFoldedText(text).count(term) == len(expected)
+
+def test_non_literal_patterns_fall_back_to_re():
+    text = "Hello World, hello python"
+    assert findall_ignorecase(r"h\w+", text) == ['Hello', 'hello', 'hon']
+    assert CaseFoldedText(text).findall("hello", 0) == ['hello']
+    with pytest.raises(ValueError):
+        CaseFoldedText(text).find_spans(r"h\w+")
+
+def test_find_spans_honours_flags():
+    text = "Hello World, hello python"
+    document = CaseFoldedText(text)
+    assert document.find_spans("hello") == [(0, 5), (13, 18)]
+    assert document.find_spans("hello", 0) == [(13, 18)]
+    assert document.find_spans(re.compile("Hello")) == [(0, 5)]
+    with pytest.raises(ValueError):
+        document.find_spans("hello", re.IGNORECASE | re.ASCII)
+
+def test_findall_ignorecase_keeps_one_document():
+    first, second = "Python python", "PYTHON"
+    assert findall_ignorecase("python", first) == ['Python', 'python']
+    assert findall_ignorecase("python", first) == ['Python', 'python']
+    assert findall_ignorecase("python", second) == ['PYTHON']
+    assert findall_ignorecase(re.compile("python"), second) == []
+
+def test_findall_ignorecase_is_thread_safe():
+    import threading
+    texts = {"Python python": ['Python', 'python'], "PYTHON only": ['PYTHON']}
+    errors = []
+
+    def worker(text):
+        for _ in range(3000):
+            found = findall_ignorecase("python", text)
+            if found != texts[text]:
+                errors.append((text, found))
+
+    threads = [threading.Thread(target=worker, args=(text,)) for text in texts for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,127 @@
+"""
+test_daemon.py
+
+Pytest-based tests for the pre-warmed matching daemon in daemon.py.
+"""
+
+import pytest
+import multiprocessing
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+from src.client import MAX_FRAME, MatchClient, recv_frame, send_frame
+from src.daemon import CHECKS, MatchServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_client(*args, input):
+    return subprocess.run([sys.executable, *args], input=input, cwd=ROOT, capture_output=True, text=True, timeout=30)
+
+@pytest.fixture(scope="module")
+def socket_path(tmp_path_factory):
+    path = os.path.join(str(tmp_path_factory.mktemp("daemon")), "regex.sock")
+    with MatchServer(path, workers=2):
+        yield path
+    assert not os.path.exists(path)
+
+def test_checks_match_solutions(socket_path):
+    emails = ["test@example.com", "invalid-email", "user.name@domain.co.uk", "a@b.c"]
+    tweets = ["Learning #Python and #Regex is #fun!", "No hashtags here."]
+    with MatchClient(socket_path) as client:
+        assert client.check("email", emails) == [True, False, True, False]
+        assert client.check("hashtags", tweets) == [['Python', 'Regex', 'fun'], []]
+        assert client.check("repeated", ["Hello hello world. This is a test test."]) == [['Hello', 'test']]
+        assert client.check("digits", []) == []
+
+def test_pipelined_replies_come_back_in_order(socket_path):
+    batches = [("digits", [f"order {i}", f"{i}-{i + 1}"]) for i in range(200)]
+    with MatchClient(socket_path) as client:
+        replies = client.pipeline(batches)
+    assert [results for results, _, _ in replies] == [[re.findall(r"\d+", item) for item in items] for _, items in batches]
+    assert all(round_trip >= server > 0 for _, round_trip, server in replies)
+
+def test_bad_requests_get_error_replies(socket_path):
+    with MatchClient(socket_path) as client:
+        with pytest.raises(ValueError, match="unknown check"):
+            client.check("phone", ["555-1234"])
+        with pytest.raises(ValueError, match="list of strings"):
+            client.check("email", [42])
+        # The connection stays usable after an error.
+        assert client.check("greeting", ["Hello World"]) == [True]
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(b"\x00\x00\x00\x03{x}")
+        reply = recv_frame(sock)
+        assert reply["id"] is None and "error" in reply
+        send_frame(sock, {"id": "a", "check": "email", "items": ["a@b.co"]})
+        assert recv_frame(sock)["results"] == [True]
+
+def test_oversized_messages_get_an_error_before_closing(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((MAX_FRAME + 1).to_bytes(4, "big"))
+        reply = recv_frame(sock)
+        assert reply["id"] is None and "exceeds the limit" in reply["error"]
+        assert recv_frame(sock) is None
+    with MatchClient(socket_path) as client:
+        with pytest.raises(ValueError, match="exceeds the limit"):
+            client.check("digits", ["1" * MAX_FRAME])
+        assert client.check("digits", ["1"]) == [["1"]]
+
+def test_lost_and_runaway_batches_time_out(tmp_path):
+    path = str(tmp_path / "slow.sock")
+    checks = dict(CHECKS, slow=(r"(a+)+$", 0, "match"))
+    before = set(multiprocessing.active_children())
+    with MatchServer(path, workers=1, checks=checks, timeout=1), MatchClient(path) as client:
+        # Catastrophic backtracking keeps the only worker busy, and killing
+        # it would lose the batch: either way the reply is an error.
+        with pytest.raises(ValueError, match="'slow' timed out"):
+            client.check("slow", ["a" * 64 + "!"])
+        for worker in set(multiprocessing.active_children()) - before:
+            worker.kill()
+        # The pool replaces the worker and the server keeps going.
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                assert client.check("digits", ["a1"]) == [["1"]]
+                break
+            except ValueError:
+                assert time.monotonic() < deadline
+
+def test_bad_checks_fail_before_starting(tmp_path):
+    path = str(tmp_path / "bad.sock")
+    with pytest.raises(re.error):
+        MatchServer(path, workers=1, checks={"bad": ("(", 0, "match")})
+    with pytest.raises(ValueError, match="unknown mode"):
+        MatchServer(path, workers=1, checks={"digits": (r"\d+", 0, "search")})
+    assert not os.path.exists(path)
+
+def test_command_line_client(socket_path):
+    result = run_client("-S", "src/client.py", socket_path, "email", input="test@example.com\ninvalid-email\r\n")
+    assert (result.returncode, result.stdout) == (0, "true\nfalse\n")
+    result = run_client("-m", "src.client", socket_path, "hashtags", input="#a and #b\nnone\n\n#c\n")
+    assert result.stdout == '["a", "b"]\n[]\n[]\n["c"]\n'
+    result = run_client("-m", "src.client", socket_path, "hashtags", "--matching", input="#a and #b\nnone\n#c")
+    assert result.stdout == "#a and #b\n#c\n"
+    result = run_client("-m", "src.client", socket_path, "phone", input="555-1234\n")
+    assert result.returncode == 1 and "unknown check 'phone'" in result.stderr
+    assert run_client("-m", "src.client", socket_path, input="").returncode == 2
+
+def test_serve_command_stops_on_sigterm(tmp_path):
+    path = str(tmp_path / "cli.sock")
+    server = subprocess.Popen([sys.executable, "-m", "src.daemon", "serve", path, "--workers", "1"], cwd=ROOT)
+    try:
+        deadline = time.monotonic() + 30
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert run_client("-m", "src.client", path, "digits", input="a1b22\n").stdout == '["1", "22"]\n'
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+    finally:
+        server.kill()
+    assert not os.path.exists(path)
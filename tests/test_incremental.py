@@ -0,0 +1,72 @@
+"""
+test_incremental.py
+
+Pytest-based tests for the incremental matcher in incremental.py.
+"""
+
+import pytest
+import random
+import re
+import src.incremental
+from src.incremental import IncrementalMatcher
+
+def random_edits(matcher, pattern, flags, alphabet, rounds, seed, max_length=8):
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        size = len(matcher.text)
+        start = rng.randint(0, size)
+        end = rng.randint(start, min(size, start + rng.randint(0, max_length)))
+        new_text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+        matcher.replace(start, end, new_text)
+        assert matcher.findall() == re.findall(pattern, matcher.text, flags)
+        assert matcher.spans() == [m.span() for m in re.finditer(pattern, matcher.text, flags)]
+
+def test_insert_and_delete():
+    matcher = IncrementalMatcher(r"\d+", "abc 12 def 345", max_width=10)
+    assert matcher.findall() == ['12', '345']
+
+    assert matcher.insert(5, "9") == [(4, 7, '192')]
+    assert matcher.findall() == ['192', '345']
+    matcher.delete(0, 4)
+    assert matcher.text == "192 def 345"
+    assert matcher.spans() == [(0, 3), (8, 11)]
+    matcher.insert(3, "0")
+    assert matcher.findall() == ['1920', '345']
+
+def test_matches_full_rescan_for_exercise_patterns():
+    # Repeated words (exercise 9) and hashtags (exercise 11)
+    words = ["cat ", "cat ", "Cat ", "the ", "the\n", "#ai ", "#AI ", "x"]
+    for pattern, flags in [(r"\b(\w+)\s+\1\b", re.IGNORECASE), (r"#([a-zA-Z0-9_]+)", 0)]:
+        text = "".join(random.Random(1).choice(words) for _ in range(300))
+        matcher = IncrementalMatcher(pattern, text, flags, max_width=40)
+        random_edits(matcher, pattern, flags, "abc #\n", rounds=300, seed=2)
+
+def test_matches_full_rescan_with_lookarounds_and_empty_matches():
+    text = "aab ab" * 100
+    for pattern in [r"(?<=a)b(?=\s)", r"a*", r"^ab|b$", r"\bab\b"]:
+        matcher = IncrementalMatcher(pattern, text, max_width=50)
+        random_edits(matcher, pattern, 0, "ab \n", rounds=200, seed=3)
+
+def test_edits_across_chunks(monkeypatch):
+    # Tiny chunks make edits span, split, merge and empty them.
+    text = "aab ab 12\n" * 20
+    for chunk_size in [1, 2, 5, 16]:
+        monkeypatch.setattr(src.incremental, "CHUNK_SIZE", chunk_size)
+        for pattern, flags in [(r"\d+", 0), (r"a*", 0), (r"^ab|b$", re.MULTILINE), (r"|a", 0), (r"(?<=a)b(?=\s)", 0)]:
+            matcher = IncrementalMatcher(pattern, text, flags, max_width=30)
+            random_edits(matcher, pattern, flags, "ab 1\n", rounds=100, seed=chunk_size, max_length=40)
+
+def test_bounded_pattern_needs_no_max_width():
+    matcher = IncrementalMatcher(r"\d{3}-\d{4}", "call 555-1234 now")
+    assert matcher.findall() == ['555-1234']
+    matcher.replace(5, 8, "666")
+    assert matcher.findall() == ['666-1234']
+
+def test_unbounded_pattern_requires_max_width():
+    with pytest.raises(ValueError):
+        IncrementalMatcher(r"\w+", "text")
+
+def test_edit_outside_document():
+    matcher = IncrementalMatcher(r"\d", "123")
+    with pytest.raises(IndexError):
+        matcher.delete(2, 5)
@@ -0,0 +1,86 @@
+"""
+test_prefilter.py
+
+Pytest-based tests for the required-literal prefilter in prefilter.py.
+"""
+
+import pytest
+import random
+import re
+from src.prefilter import PrefilteredPattern, prefiltered
+
+EXERCISE_5 = r"..\[(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] User '(?P<username>.*?)' performed '(?P<action>.*?)'."
+
+def test_extracts_literals_and_anchors():
+    screened = PrefilteredPattern(r"^Hello.*World$")
+    assert screened.prefix == "Hello"
+    assert screened.suffix == "World"
+    assert screened.suffix_newline
+
+    screened = PrefilteredPattern(r"<b>(.*?)</b>")
+    assert screened.prefix == ""
+    assert screened.clauses == [('</b>',), ('<b>',)]
+
+    screened = PrefilteredPattern(EXERCISE_5)
+    # ' ' and "'" are already implied by the longer literals.
+    assert screened.clauses == [("' performed '",), ("] User '",), ('-',), (':',), ('[',)]
+
+def test_scoped_ignorecase_group():
+    screened = PrefilteredPattern(r"(?i:user) alice")
+    assert screened.clauses == [(' alice',)]
+    assert screened.search("USER alice").group() == "USER alice"
+    assert screened.findall("User alice, user alice") == ['User alice', 'user alice']
+
+def test_screen_rejects_lines_without_literals():
+    screened = prefiltered(r"^Hello.*World$")
+    assert screened.screen("Hello Python World")
+    assert screened.screen("Hello World\n")
+    assert not screened.screen("Python World")
+    assert not screened.screen("Hello Python")
+    assert prefiltered(r"^Hello.*World$") is screened
+
+def test_results_agree_with_re():
+    rng = random.Random(0)
+    pieces = ["Hello", "World", "<b>", "</b>", " ", "\n", "x", "User 'a'", " performed 'b'.", "I [2023-10-26 14:35:01] "]
+    patterns = [
+        (r"^Hello.*World$", 0),
+        (r"^Hello.*World$", re.MULTILINE),
+        (r"\AHello", 0),
+        (r"<b>(.*?)</b>", 0),
+        (EXERCISE_5, 0),
+        (r"(Hello|World)x", 0),
+        (r"hello", re.IGNORECASE),
+        (r"(?i:hello) World", 0),
+        (r"^(?i:HELLO)x", 0),
+    ]
+    for _ in range(2000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+        for pattern, flags in patterns:
+            screened = PrefilteredPattern(pattern, flags)
+            compiled = re.compile(pattern, flags)
+            assert screened.findall(text) == compiled.findall(text)
+            assert bool(screened.search(text)) == bool(compiled.search(text))
+            assert bool(screened.match(text)) == bool(compiled.match(text))
+
+def test_bytes_patterns():
+    screened = PrefilteredPattern(rb"^Hello.*World$")
+    assert (screened.prefix, screened.suffix) == (b"Hello", b"World")
+    assert screened.search(b"Hello byte World\n")
+    assert not screened.search(b"Hello bytes")
+    assert PrefilteredPattern(rb"abc").search(b"xabc").span() == (1, 4)
+    rng = random.Random(1)
+    pieces = [b"caf\xe9", b"<b>", b"</b>", b" ", b"\n", b"x"]
+    for pattern in [rb"caf\xe9 <b>(.*?)</b>", rb"^x.*caf\xe9$", rb"(<b>|x)\n"]:
+        screened = PrefilteredPattern(pattern)
+        for _ in range(500):
+            text = b"".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+            assert screened.findall(text) == re.findall(pattern, text)
+
+def test_search_lines():
+    lines = [
+        "I [2023-10-26 14:35:01] User 'alice' performed 'login'.",
+        "nothing to see here",
+        "I [2023-10-26 14:36:12] User 'bob' performed 'logout'.",
+    ]
+    found = [(number, m.group("username")) for number, m in PrefilteredPattern(EXERCISE_5).search_lines(lines)]
+    assert found == [(1, 'alice'), (3, 'bob')]
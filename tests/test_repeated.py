@@ -0,0 +1,47 @@
+"""
+test_repeated.py
+
+Pytest-based tests for the backreference-free repeated-word detector in repeated.py.
+"""
+
+import pytest
+import random
+import re
+from src.repeated import find_repeated_words, iter_repeated_words
+
+REPEATED = re.compile(r'\b(\w+)\s+\1\b', re.IGNORECASE)
+
+def random_splits(rng, text):
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 4)))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+def test_exercise_9_example():
+    text = "The cat sat on the mat. Hello hello world. This is a test test."
+    assert find_repeated_words(text) == ['Hello', 'test']
+    assert find_repeated_words(text, ignorecase=False) == ['test']
+    assert find_repeated_words("a a a") == ['a']
+    assert find_repeated_words("a_b a_b a_b") == ['a_b']
+    assert find_repeated_words("x.the the.y") == ['the']
+    # A backreference only compares simple lowercase, unlike a literal.
+    assert find_repeated_words("s ſ") == find_repeated_words("σ ς") == find_repeated_words("µ μ") == []
+    assert find_repeated_words("ΣΑΣ σασ") == ['ΣΑΣ']
+
+def test_agrees_with_backreference_regex():
+    rng = random.Random(0)
+    pieces = ["the", "The", "THE", "a", "b_c", "1", ".", ",", "-", "ß", "İ", "i", "s", "ſ", "σ", "ς", "Σ", "µ", "μ", "k", "\u212a", " ", "  ", "\n", "\t"]
+    for _ in range(5000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 15)))
+        expected = REPEATED.findall(text)
+        assert find_repeated_words(text) == expected, text
+        assert list(iter_repeated_words(random_splits(rng, text))) == expected, text
+        assert find_repeated_words(text, ignorecase=False) == re.findall(r'\b(\w+)\s+\1\b', text)
+
+def test_window():
+    assert find_repeated_words("the cat the dog", window=1) == []
+    assert find_repeated_words("the cat the dog", window=2) == ['the']
+    # Punctuation ends a run, and a reported repeat starts a new one.
+    assert find_repeated_words("the cat. the dog", window=2) == []
+    assert find_repeated_words("a b a b", window=3) == ['a']
+    assert list(iter_repeated_words(["The c", "at th", "e"], window=2)) == ['The']
+    with pytest.raises(ValueError):
+        find_repeated_words("the the", window=0)
@@ -0,0 +1,65 @@
+"""
+test_startup.py
+
+Import-time regression tests: importing the package (or a helper module)
+must stay cheap, with no regex compilation and no heavy dependencies.
+"""
+
+import pytest
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIGHT_MODULES = ["src.analysis", "src.casefold", "src.incremental", "src.prefilter",
+                 "src.repeated", "src.streaming", "src.trigram"]
+
+def run_python(*args):
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result
+
+def importtime_modules(*args):
+    stderr = run_python("-X", "importtime", *args).stderr
+    # Lines look like "import time:   self [us] | cumulative |   module".
+    return {line.rsplit("|", 1)[1].strip() for line in stderr.splitlines() if line.startswith("import time:")}
+
+def imported_modules(statement):
+    """Returns the modules that `statement` loads beyond interpreter startup."""
+    # Startup itself (site, .pth hooks) may import anything, re included.
+    return importtime_modules("-c", statement) - importtime_modules("-c", "pass")
+
+def test_import_package_loads_no_submodules():
+    assert imported_modules("import src") == {"src"}
+
+def test_submodules_load_on_first_access():
+    modules = imported_modules("import src; src.repeated.find_repeated_words('a a')")
+    assert "src.repeated" in modules
+    assert "src.trigram" not in modules
+    assert "src.batch" not in modules
+
+@pytest.mark.parametrize("module", LIGHT_MODULES)
+def test_helper_imports_skip_heavy_dependencies(module):
+    modules = imported_modules(f"import {module}")
+    assert module in modules
+    for heavy in ("numpy", "json", "src.batch"):
+        assert heavy not in modules
+
+def test_client_imports_only_what_a_round_trip_needs():
+    # A shell pipeline pays for these imports on every batch.
+    assert imported_modules("import src.client") <= {"src", "src.client", "_socket", "struct", "_struct"}
+
+def test_import_compiles_no_patterns():
+    # Count re.compile() calls made from this package while importing it.
+    script = f"""
+import re, sys
+calls = []
+compile = re._compile
+def counting(pattern, flags):
+    if sys._getframe(2).f_code.co_filename.startswith({os.path.join(ROOT, "src")!r}):
+        calls.append(pattern)
+    return compile(pattern, flags)
+re._compile = counting
+import {", ".join(LIGHT_MODULES)}
+print(calls)
+"""
+    assert run_python("-c", script).stdout.strip() == "[]"
@@ -0,0 +1,70 @@
+"""
+test_streaming.py
+
+Pytest-based tests for the chunked stream matcher in streaming.py.
+"""
+
+import pytest
+import io
+import random
+import re
+import tracemalloc
+from src.streaming import stream_finditer
+
+def expected_matches(pattern, text, flags=0):
+    compiled = re.compile(pattern, flags)
+    return [(m.start(), m.end(), value) for m, value in zip(compiled.finditer(text), compiled.findall(text))]
+
+def test_matches_straddling_chunk_boundaries():
+    text = "The year is 2023, and the temperature is 25 degrees."
+    for chunk_size in range(1, 12):
+        found = list(stream_finditer(r"\d+", io.StringIO(text), chunk_size=chunk_size, max_width=10))
+        assert found == [(12, 16, '2023'), (41, 43, '25')]
+
+def test_agrees_with_finditer_on_random_text():
+    # Property check: any chunk size gives the same result as one finditer() call.
+    rng = random.Random(0)
+    patterns = [
+        (r"\b(\w+)\s+\1\b", re.IGNORECASE),
+        (r"#([a-zA-Z0-9_]+)", 0),
+        (r"(?<=a)b(?=\s)", 0),
+        (r"^ab|b$", re.MULTILINE),
+        (r"a*", 0),
+        (r"\d{2}-\d{2}", 0),
+    ]
+    for _ in range(200):
+        text = "".join(rng.choice(["ab ", "b", "a", "\n", "cat cat ", "#ai", "12-34", " "]) for _ in range(rng.randint(0, 60)))
+        chunk_size = rng.randint(1, 20)
+        for pattern, flags in patterns:
+            found = list(stream_finditer(pattern, io.StringIO(text), flags, chunk_size=chunk_size, max_width=30))
+            assert found == expected_matches(pattern, text, flags)
+
+def test_bytes_stream():
+    data = b"id=17;id=4;id=256"
+    found = list(stream_finditer(rb"id=(\d+)", io.BytesIO(data), chunk_size=4, max_width=16))
+    assert [value for _, _, value in found] == [b'17', b'4', b'256']
+
+def test_memory_does_not_grow_with_stream_size():
+    class RepeatingStream:
+        def __init__(self, size):
+            self.remaining = size
+        def read(self, size):
+            size = min(size, self.remaining)
+            self.remaining -= size
+            return ("word word 12 " * (size // 13 + 1))[:size]
+
+    tracemalloc.start()
+    count = sum(1 for _ in stream_finditer(r"\d+", RepeatingStream(4_000_000), chunk_size=65536, max_width=16))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count > 300_000
+    assert peak < 1_000_000
+
+def test_unbounded_pattern_requires_max_width():
+    with pytest.raises(ValueError):
+        list(stream_finditer(r"\d+", io.StringIO("123")))
+
+def test_chunk_size_must_be_positive():
+    for chunk_size in (0, -1):
+        with pytest.raises(ValueError):
+            list(stream_finditer(r"\d", io.StringIO("123"), chunk_size=chunk_size))
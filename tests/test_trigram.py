@@ -0,0 +1,127 @@
+"""
+test_trigram.py
+
+Pytest-based tests for the trigram index in trigram.py.
+"""
+
+import pytest
+import os
+import random
+from src import trigram
+from src.trigram import TrigramIndex, file_trigrams, full_scan
+
+def write(root, name, text):
+    with open(os.path.join(root, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "corpus"
+    root.mkdir()
+    write(root, "a.log", "[2023-10-26 14:35:01] User 'alice' performed 'login'.\n")
+    write(root, "b.log", "[2023-10-26 14:36:12] User 'bob' performed 'logout'.\n")
+    write(root, "c.txt", "Hello hello world, nothing to see here.\n")
+    return str(root), str(tmp_path / "index")
+
+def test_file_trigrams():
+    assert file_trigrams(b"abcd") == {int.from_bytes(b"abc", "big"), int.from_bytes(b"bcd", "big")}
+    assert file_trigrams(b"ab") == set()
+
+def test_candidates_use_required_literals(corpus):
+    root, index_dir = corpus
+    with TrigramIndex(index_dir, root) as index:
+        assert index.update() == (3, 0)
+        assert index.candidates(r"User '(.*?)' performed") == ['a.log', 'b.log']
+        assert index.candidates(r"performed 'log(in|out)'") == ['a.log', 'b.log']
+        assert index.candidates(r"alice|world") == ['a.log', 'c.txt']
+        assert index.candidates(r"\d+") == ['a.log', 'b.log', 'c.txt']
+        assert list(index.search(r"User '(\w+)' performed 'login'")) == [('a.log', 22, 52, 'alice')]
+
+def test_scoped_ignorecase_group_is_not_required(corpus):
+    root, index_dir = corpus
+    write(root, "d.log", "USER 'dave' performed 'login'.\n")
+    with TrigramIndex(index_dir, root) as index:
+        index.update()
+        pattern = r"(?i:user) '(\w+)' performed"
+        assert index.candidates(pattern) == ['a.log', 'b.log', 'd.log']
+        assert list(index.search(pattern)) == list(full_scan(root, pattern))
+        assert ('d.log', 0, 21, 'dave') in list(index.search(pattern))
+
+def test_search_agrees_with_full_scan(tmp_path):
+    root = tmp_path / "corpus"
+    root.mkdir()
+    rng = random.Random(0)
+    words = ["cat", "dog", "user", "login", "error", "42", "cat cat"]
+    for i in range(50):
+        write(root, f"{i}.txt", " ".join(rng.choice(words) for _ in range(rng.randint(0, 30))))
+    with TrigramIndex(str(tmp_path / "index"), str(root)) as index:
+        index.update()
+        for pattern in [r"login", r"\b(\w+)\s+\1\b", r"user (\w+) error", r"cat|error", r"\d+"]:
+            assert list(index.search(pattern)) == list(full_scan(str(root), pattern))
+
+def test_update_reads_in_chunks_and_flushes_segments(tmp_path, monkeypatch):
+    root = tmp_path / "corpus"
+    root.mkdir()
+    rng = random.Random(1)
+    words = ["alpha", "beta", "login", "error", "timeout"]
+    for i in range(20):
+        write(root, f"{i}.txt", " ".join(rng.choice(words) for _ in range(200)) + f" user{i}")
+    monkeypatch.setattr(trigram, "READ_SIZE", 7)
+    index_dir = str(tmp_path / "index")
+    with TrigramIndex(index_dir, str(root), segment_postings=100) as index:
+        assert index.update() == (20, 0)
+        assert len(os.listdir(index_dir)) > 3
+        with open(root / "3.txt", "rb") as f:
+            assert trigram._read_trigrams(str(root / "3.txt")) == file_trigrams(f.read())
+        for pattern in [r"login error", r"user1\b", r"timeout (\w+) beta"]:
+            assert list(index.search(pattern)) == list(full_scan(str(root), pattern))
+
+def test_update_skips_unreadable_entries(corpus):
+    root, index_dir = corpus
+    os.symlink(os.path.join(root, "missing.log"), os.path.join(root, "dangling.log"))
+    os.mkfifo(os.path.join(root, "pipe"))
+    with TrigramIndex(index_dir, root) as index:
+        assert index.update() == (3, 0)
+        assert sorted(index.skipped) == ['dangling.log', 'pipe']
+        assert list(index.search(r"performed")) == list(full_scan(root, r"performed"))
+
+def test_full_scan_excludes_index_below_root(tmp_path):
+    root = tmp_path / "corpus"
+    root.mkdir()
+    write(root, "a.txt", "segment manifest")
+    index_dir = str(root / ".index")
+    with TrigramIndex(index_dir, str(root)) as index:
+        index.update()
+        pattern = r"segment|manifest|files"
+        assert list(index.search(pattern)) == list(full_scan(str(root), pattern, exclude=index_dir))
+        assert {path for path, *_ in full_scan(str(root), pattern)} > {'a.txt'}
+
+def test_crlf_files_are_searched_as_indexed(tmp_path):
+    root = tmp_path / "corpus"
+    root.mkdir()
+    (root / "dos.txt").write_bytes(b"foo\r\nbar\r\n")
+    (root / "unix.txt").write_bytes(b"foo\nbar\n")
+    with TrigramIndex(str(tmp_path / "index"), str(root)) as index:
+        index.update()
+        for pattern in [r"foo\nbar", r"foo\r\nbar", r"bar$"]:
+            assert list(index.search(pattern)) == list(full_scan(str(root), pattern))
+        assert list(index.search(r"foo\r\nbar")) == [('dos.txt', 0, 8, 'foo\r\nbar')]
+
+def test_incremental_update_and_compact(corpus):
+    root, index_dir = corpus
+    with TrigramIndex(index_dir, root) as index:
+        index.update()
+        assert index.update() == (0, 0)
+
+    write(root, "c.txt", "Now User 'carol' performed 'login'.\n")
+    os.remove(os.path.join(root, "b.log"))
+    write(root, "d.log", "User 'dave' performed 'logout'.\n")
+
+    # Reopening reads the persisted index.
+    with TrigramIndex(index_dir, root) as index:
+        assert index.update() == (2, 1)
+        assert index.candidates(r"performed") == ['a.log', 'c.txt', 'd.log']
+        assert index.candidates(r"Hello") == []
+        index.compact()
+        assert len(os.listdir(index_dir)) == 2
+        assert index.candidates(r"performed") == ['a.log', 'c.txt', 'd.log']